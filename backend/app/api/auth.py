@@ -1,21 +1,18 @@
 """Authentication API endpoints."""
+import hmac
 import logging
-import os
-from pathlib import Path
 
-from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, Response, status
 from pydantic import BaseModel, Field
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.config import settings
 from app.dependencies.auth import get_current_user
 from app.services import auth_service
+from app.utils.envfile import update_env
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 class LoginRequest(BaseModel):
@@ -33,19 +30,23 @@ class UserResponse(BaseModel):
 
 
 @router.post("/login", response_model=LoginResponse)
-@limiter.limit("5/minute")
-def login(request: Request, response: Response, credentials: LoginRequest):
+def login(
+    request: Request,
+    response: Response,
+    credentials: LoginRequest,
+    background_tasks: BackgroundTasks,
+):
     """Authenticate and set HttpOnly JWT cookie + CSRF cookie."""
-    # Verify username
-    if credentials.username != settings.gui_username:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid username or password",
-        )
+    # Verify username in constant time. A mismatch does not return early so
+    # the password check below still runs and timing doesn't reveal which
+    # of the two credentials was wrong.
+    username_valid = hmac.compare_digest(
+        credentials.username.encode("utf-8"),
+        settings.gui_username.encode("utf-8"),
+    )
 
     # Verify password — supports both bcrypt hash and plaintext (legacy)
     password_valid = False
-    needs_hash_upgrade = False
 
     if settings.gui_password_hash:
         # Modern: bcrypt hash
@@ -53,25 +54,29 @@ def login(request: Request, response: Response, credentials: LoginRequest):
             credentials.password, settings.gui_password_hash
         )
     elif settings.gui_password_plain:
-        # Legacy: plaintext password — verify directly
-        password_valid = credentials.password == settings.gui_password_plain
-        if password_valid:
-            needs_hash_upgrade = True
+        # Legacy: plaintext password — verify directly (constant time)
+        password_valid = hmac.compare_digest(
+            credentials.password.encode("utf-8"),
+            settings.gui_password_plain.encode("utf-8"),
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="No password configured. Run setup first.",
         )
 
-    if not password_valid:
+    if not (username_valid and password_valid):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
         )
 
-    # Auto-upgrade plaintext password to bcrypt hash
-    if needs_hash_upgrade:
-        _upgrade_password_hash(credentials.password)
+    # Upgrade a plaintext password or low-cost hash after the response is
+    # sent, so the extra hash and .env rewrite don't add to login latency
+    if not settings.gui_password_hash or auth_service.password_needs_rehash(
+        settings.gui_password_hash
+    ):
+        background_tasks.add_task(_upgrade_password_hash, credentials.password)
 
     # Create JWT access token
     access_token = auth_service.create_access_token(subject=credentials.username)
@@ -140,44 +145,23 @@ def get_me(request: Request):
 
 
 def _upgrade_password_hash(plaintext_password: str) -> None:
-    """Auto-upgrade a plaintext password to bcrypt hash in .env.
+    """Store a fresh bcrypt hash of the admin password in .env.
 
-    This runs once on first login after upgrading from a legacy installation.
+    Runs as a background task scheduled by the login endpoint: once to
+    replace a legacy plaintext password, and whenever the stored hash's cost
+    is below the calibrated cost (e.g. the cheaper hash made during setup).
     """
     try:
         hashed = auth_service.hash_password(plaintext_password)
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-
-        if not env_path.exists():
-            return
-
-        with open(env_path, "r") as f:
-            content = f.read()
-
-        lines = content.split("\n")
-        new_lines = []
-        hash_added = False
-
-        for line in lines:
-            # Remove the old plaintext password line
-            if line.startswith("PARSEDMARC_GUI_PASSWORD="):
-                continue
-            # Check if hash already exists
-            if line.startswith("PARSEDMARC_GUI_PASSWORD_HASH="):
-                hash_added = True
-            new_lines.append(line)
-
-        if not hash_added:
-            new_lines.append(f"PARSEDMARC_GUI_PASSWORD_HASH={hashed}")
-
-        with open(env_path, "w") as f:
-            f.write("\n".join(new_lines))
+        update_env({
+            "PARSEDMARC_GUI_PASSWORD_HASH": hashed,
+            "PARSEDMARC_GUI_PASSWORD": None,
+        })
 
-        try:
-            os.chmod(env_path, 0o600)
-        except OSError:
-            pass  # Windows
+        # Verify against the new hash from now on, so later logins don't upgrade again
+        settings.gui_password_hash = hashed
+        settings.gui_password_plain = None
 
-        logger.info("Auto-upgraded plaintext password to bcrypt hash in .env")
+        logger.info("Stored upgraded bcrypt password hash in .env")
     except Exception as e:
         logger.warning("Failed to auto-upgrade password hash: %s", e)
@@ -1,14 +1,18 @@
 """Dashboard API endpoints for aggregated statistics."""
+import asyncio
 import logging
+import threading
+import time
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Tuple
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import case, func, select, true
 
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.dependencies.auth import get_current_user
 from app.models.parse_job import ParseJob
 from app.models.parsed_report import ParsedReport
@@ -52,6 +56,49 @@ class DashboardResponse(BaseModel):
     recent_activity: List[ActivityLogEntry]
 
 
+# ---------- Stats cache ----------
+
+# Counts change on the order of minutes, so a short TTL absorbs dashboard
+# polling without serving noticeably stale numbers.
+STATS_CACHE_TTL_SECONDS = 30
+
+_stats_cache: Optional[Tuple[float, DashboardStats]] = None
+_stats_cache_lock = threading.Lock()
+# Bumped on every invalidation. A request only stores its result if the
+# generation it started under is still current, so a query that was
+# already running when the cache was invalidated can't put its stale
+# result back.
+_stats_generation = 0
+
+
+# Config counts only change through the config create/delete endpoints,
+# which invalidate them directly, so they can be kept much longer. The TTL
+# only bounds staleness for changes made by other worker processes.
+CONFIG_COUNTS_CACHE_TTL_SECONDS = 300
+
+_config_counts_cache: Optional[Tuple[float, int, int]] = None
+# Same guard as _stats_generation, for the config counts
+_config_counts_generation = 0
+
+
+def invalidate_dashboard_stats() -> None:
+    """Drop the cached dashboard stats so the next request recomputes them."""
+    global _stats_cache, _stats_generation
+    with _stats_cache_lock:
+        _stats_cache = None
+        _stats_generation += 1
+
+
+def invalidate_config_counts() -> None:
+    """Drop the cached mailbox/output config counts along with the stats."""
+    global _stats_cache, _stats_generation, _config_counts_cache, _config_counts_generation
+    with _stats_cache_lock:
+        _stats_cache = None
+        _stats_generation += 1
+        _config_counts_cache = None
+        _config_counts_generation += 1
+
+
 # ---------- Router ----------
 
 router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
@@ -59,43 +106,79 @@ router = APIRouter(prefix="/api/dashboard", tags=["Dashboard"])
 
 @router.get("/stats", response_model=DashboardStats)
 def get_dashboard_stats(db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
-    """Get aggregated dashboard statistics."""
-    # Report counts by type
-    report_counts = (
-        db.query(
-            ParsedReport.report_type,
-            func.count(ParsedReport.id),
-        )
-        .group_by(ParsedReport.report_type)
-        .all()
+    """Get aggregated dashboard statistics.
+
+    All counts are gathered in a single SELECT: report and job counts come
+    from one conditional-aggregate pass over each table, config counts from
+    scalar subqueries. The result is cached for STATS_CACHE_TTL_SECONDS;
+    config counts are cached separately and only re-counted when they have
+    been invalidated or CONFIG_COUNTS_CACHE_TTL_SECONDS has passed.
+    """
+    global _stats_cache, _config_counts_cache
+    now = time.monotonic()
+    with _stats_cache_lock:
+        cached = _stats_cache
+        generation = _stats_generation
+        config_counts = _config_counts_cache
+        counts_generation = _config_counts_generation
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    if config_counts is not None and config_counts[0] <= now:
+        config_counts = None
+
+    report_stats = select(
+        func.count().label("total"),
+        func.count(case((ParsedReport.report_type == "aggregate", 1))).label("aggregate"),
+        func.count(case((ParsedReport.report_type == "forensic", 1))).label("forensic"),
+        func.count(case((ParsedReport.report_type == "smtp_tls", 1))).label("smtp_tls"),
+    ).subquery()
+
+    job_stats = select(
+        func.count().label("total"),
+        func.count(case((ParseJob.status == "completed", 1))).label("completed"),
+        func.count(case((ParseJob.status == "failed", 1))).label("failed"),
+    ).subquery()
+
+    columns = [
+        report_stats.c.total,
+        report_stats.c.aggregate,
+        report_stats.c.forensic,
+        report_stats.c.smtp_tls,
+        job_stats.c.total,
+        job_stats.c.completed,
+        job_stats.c.failed,
+    ]
+    if config_counts is None:
+        columns += [
+            select(func.count(MailboxConfig.id)).scalar_subquery(),
+            select(func.count(OutputConfig.id)).scalar_subquery(),
+        ]
+
+    row = db.execute(
+        select(*columns).select_from(report_stats.join(job_stats, true()))
+    ).one()
+
+    if config_counts is None:
+        config_counts = (now + CONFIG_COUNTS_CACHE_TTL_SECONDS, row[7] or 0, row[8] or 0)
+
+    stats = DashboardStats(
+        total_reports=row[0],
+        aggregate_reports=row[1],
+        forensic_reports=row[2],
+        smtp_tls_reports=row[3],
+        total_jobs=row[4],
+        completed_jobs=row[5],
+        failed_jobs=row[6],
+        mailbox_configs=config_counts[1],
+        output_configs=config_counts[2],
     )
-    type_map = {row[0]: row[1] for row in report_counts}
 
-    # Job counts by status
-    job_counts = (
-        db.query(
-            ParseJob.status,
-            func.count(ParseJob.id),
-        )
-        .group_by(ParseJob.status)
-        .all()
-    )
-    status_map = {row[0]: row[1] for row in job_counts}
-
-    total_reports = sum(type_map.values())
-    total_jobs = sum(status_map.values())
-
-    return DashboardStats(
-        total_reports=total_reports,
-        aggregate_reports=type_map.get("aggregate", 0),
-        forensic_reports=type_map.get("forensic", 0),
-        smtp_tls_reports=type_map.get("smtp_tls", 0),
-        total_jobs=total_jobs,
-        completed_jobs=status_map.get("completed", 0),
-        failed_jobs=status_map.get("failed", 0),
-        mailbox_configs=db.query(func.count(MailboxConfig.id)).scalar() or 0,
-        output_configs=db.query(func.count(OutputConfig.id)).scalar() or 0,
-    )
+    with _stats_cache_lock:
+        if _stats_generation == generation:
+            _stats_cache = (now + STATS_CACHE_TTL_SECONDS, stats)
+        if _config_counts_cache is None and _config_counts_generation == counts_generation:
+            _config_counts_cache = config_counts
+    return stats
 
 
 @router.get("/activity", response_model=List[ActivityLogEntry])
@@ -104,19 +187,44 @@ def get_recent_activity(
     db: Session = Depends(get_db),
     _user: str = Depends(get_current_user),
 ):
-    """Get recent activity log entries."""
-    entries = (
-        db.query(ActivityLog)
+    """Get recent activity log entries.
+
+    Served by a backward scan of the created_at index. Only the columns in
+    ActivityLogEntry are selected, so the free-form ``details`` payload is
+    never fetched for the feed.
+    """
+    entries = db.execute(
+        select(
+            ActivityLog.id,
+            ActivityLog.level,
+            ActivityLog.source,
+            ActivityLog.message,
+            ActivityLog.created_at,
+        )
         .order_by(ActivityLog.created_at.desc())
         .limit(limit)
-        .all()
-    )
+    ).all()
     return entries
 
 
+def _run_with_session(query: Callable[..., Any], **kwargs) -> Any:
+    """Run a dashboard query function with its own short-lived session."""
+    db = SessionLocal()
+    try:
+        return query(db=db, **kwargs)
+    finally:
+        db.close()
+
+
 @router.get("", response_model=DashboardResponse)
-def get_dashboard(db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
-    """Get full dashboard data (stats + recent activity)."""
-    stats = get_dashboard_stats(db)
-    activity = get_recent_activity(limit=10, db=db)
+async def get_dashboard(_user: str = Depends(get_current_user)):
+    """Get full dashboard data (stats + recent activity).
+
+    The two queries are independent, so each runs in the threadpool with its
+    own session and the response waits on the slower one, not both.
+    """
+    stats, activity = await asyncio.gather(
+        run_in_threadpool(_run_with_session, get_dashboard_stats),
+        run_in_threadpool(_run_with_session, get_recent_activity, limit=10),
+    )
     return DashboardResponse(stats=stats, recent_activity=activity)
@@ -1,13 +1,13 @@
 """Mailbox configuration API endpoints."""
 import logging
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
 from app.db.session import get_db
+from app.api.dashboard import invalidate_config_counts
 from app.dependencies.auth import get_current_user
 from app.models.mailbox_config import MailboxConfig
 from app.schemas.mailbox_config import (
@@ -15,66 +15,123 @@ from app.schemas.mailbox_config import (
     MailboxConfigUpdate,
     MailboxConfigResponse
 )
-from app.services.encryption_service import EncryptionService
+from app.services.encryption_service import encryption_service
 from app.services.mailbox_service import mailbox_service
 from app.api.parsing import ConnectionTestResponse
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/configs/mailboxes", tags=["Mailbox Configurations"])
-limiter = Limiter(key_func=get_remote_address)
-encryption_service = EncryptionService()
 
 
-def _serialize_config_for_response(config: MailboxConfig) -> dict:
-    """Serialize mailbox config for API response (decrypt and mask passwords)."""
-    response_data = {
-        "id": config.id,
-        "name": config.name,
-        "type": config.type,
-        "enabled": config.enabled,
-        "delete_after_processing": config.delete_after_processing,
-        "watch_interval": config.watch_interval,
-        "created_at": config.created_at,
-        "updated_at": config.updated_at,
-    }
+# (mailbox type, settings attribute) pairs shared by the schemas and model
+_TYPE_ATTRS = (
+    ("imap", "imap_settings"),
+    ("msgraph", "msgraph_settings"),
+    ("gmail", "gmail_settings"),
+    ("maildir", "maildir_settings"),
+)
+_SETTINGS_FIELDS = tuple(attr for _, attr in _TYPE_ATTRS)
 
-    # Decrypt and mask sensitive settings
-    if config.imap_settings:
-        settings = encryption_service.decrypt_dict(config.imap_settings)
-        settings["password"] = "***ENCRYPTED***" if settings.get("password") else None
-        response_data["imap_settings"] = settings
 
-    if config.msgraph_settings:
-        settings = encryption_service.decrypt_dict(config.msgraph_settings)
+def _mask_settings(field: str, settings: dict) -> dict:
+    """Mask secrets in decrypted mailbox settings (in-place)."""
+    if field == "imap_settings":
+        settings["password"] = "***ENCRYPTED***" if settings.get("password") else None
+    elif field == "msgraph_settings":
         if settings.get("client_secret"):
             settings["client_secret"] = "***ENCRYPTED***"
         if settings.get("password"):
             settings["password"] = "***ENCRYPTED***"
-        response_data["msgraph_settings"] = settings
+    # Gmail uses OAuth tokens and Maildir only a path — nothing to mask
+    return settings
+
+
+_BASE_COLUMNS = (
+    MailboxConfig.id,
+    MailboxConfig.name,
+    MailboxConfig.type,
+    MailboxConfig.enabled,
+    MailboxConfig.delete_after_processing,
+    MailboxConfig.watch_interval,
+    MailboxConfig.created_at,
+    MailboxConfig.updated_at,
+)
+
+
+def _base_response_fields(config: MailboxConfig) -> dict:
+    """Non-encrypted mailbox config fields for an API response."""
+    return {column.key: getattr(config, column.key) for column in _BASE_COLUMNS}
 
-    if config.gmail_settings:
-        settings = encryption_service.decrypt_dict(config.gmail_settings)
-        # Gmail uses OAuth tokens, not passwords
-        response_data["gmail_settings"] = settings
 
-    if config.maildir_settings:
-        settings = encryption_service.decrypt_dict(config.maildir_settings)
-        response_data["maildir_settings"] = settings
+def _serialize_config_for_response(config: MailboxConfig) -> dict:
+    """Serialize mailbox config for API response (decrypt and mask passwords)."""
+    response_data = _base_response_fields(config)
+
+    # Decrypt and mask sensitive settings
+    for field in _SETTINGS_FIELDS:
+        encrypted = getattr(config, field)
+        if encrypted:
+            response_data[field] = _mask_settings(field, encryption_service.decrypt_dict(encrypted))
 
     return response_data
 
 
+def _serialize_configs_for_response(configs: List[MailboxConfig]) -> List[dict]:
+    """Serialize several mailbox configs, decrypting all settings in one batch."""
+    responses = [_base_response_fields(config) for config in configs]
+
+    # Collect every encrypted blob, decrypt them together, then splice back
+    targets = []
+    ciphertexts = []
+    for response_data, config in zip(responses, configs):
+        for field in _SETTINGS_FIELDS:
+            encrypted = getattr(config, field)
+            if encrypted:
+                targets.append((response_data, field))
+                ciphertexts.append(encrypted)
+
+    for (response_data, field), settings in zip(targets, encryption_service.decrypt_many(ciphertexts)):
+        response_data[field] = _mask_settings(field, settings)
+
+    return responses
+
+
 @router.get("/", response_model=List[MailboxConfigResponse])
 def list_mailbox_configs(
-    skip: int = Query(0, ge=0),
+    response: Response,
+    after_id: Optional[int] = Query(None, ge=0, description="Return configs with an ID greater than this cursor"),
     limit: int = Query(100, ge=1, le=200),
+    include_settings: bool = Query(False, description="Also return the (masked) type-specific settings"),
     db: Session = Depends(get_db),
     _user: str = Depends(get_current_user),
 ):
-    """List all mailbox configurations."""
-    configs = db.query(MailboxConfig).offset(skip).limit(limit).all()
-    return [_serialize_config_for_response(config) for config in configs]
+    """List all mailbox configurations.
+
+    Uses keyset pagination on the primary key: when a full page is returned,
+    the X-Next-Cursor header holds the ``after_id`` for the next page.
+
+    By default only the base columns are selected: the list view doesn't
+    need type-specific settings (the single-config endpoint returns them),
+    so the encrypted settings blobs are never loaded or decrypted. With
+    ``include_settings`` the page's settings are decrypted in one batch.
+    """
+    query = select(MailboxConfig) if include_settings else select(*_BASE_COLUMNS)
+    if after_id is not None:
+        query = query.where(MailboxConfig.id > after_id)
+    query = query.order_by(MailboxConfig.id).limit(limit)
+
+    if include_settings:
+        rows = db.scalars(query).all()
+        results = _serialize_configs_for_response(rows)
+    else:
+        rows = db.execute(query).all()
+        results = [row._asdict() for row in rows]
+
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+
+    return results
 
 
 @router.get("/{config_id}", response_model=MailboxConfigResponse)
@@ -84,7 +141,7 @@ def get_mailbox_config(
     _user: str = Depends(get_current_user),
 ):
     """Get a specific mailbox configuration by ID."""
-    config = db.query(MailboxConfig).filter(MailboxConfig.id == config_id).first()
+    config = db.get(MailboxConfig, config_id)
     if not config:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -102,14 +159,8 @@ def create_mailbox_config(
     """Create a new mailbox configuration."""
 
     # Validate that appropriate settings are provided for the mailbox type
-    settings_map = {
-        "imap": config_data.imap_settings,
-        "msgraph": config_data.msgraph_settings,
-        "gmail": config_data.gmail_settings,
-        "maildir": config_data.maildir_settings
-    }
-
-    if not settings_map.get(config_data.type):
+    settings_attr = next((attr for type_, attr in _TYPE_ATTRS if type_ == config_data.type), None)
+    if settings_attr is None or getattr(config_data, settings_attr) is None:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Missing {config_data.type}_settings for mailbox type '{config_data.type}'"
@@ -125,30 +176,14 @@ def create_mailbox_config(
     )
 
     # Encrypt and store type-specific settings
-    if config_data.imap_settings:
-        db_config.imap_settings = encryption_service.encrypt_dict(
-            config_data.imap_settings.model_dump()
-        )
-
-    if config_data.msgraph_settings:
-        db_config.msgraph_settings = encryption_service.encrypt_dict(
-            config_data.msgraph_settings.model_dump()
-        )
-
-    if config_data.gmail_settings:
-        db_config.gmail_settings = encryption_service.encrypt_dict(
-            config_data.gmail_settings.model_dump()
-        )
-
-    if config_data.maildir_settings:
-        db_config.maildir_settings = encryption_service.encrypt_dict(
-            config_data.maildir_settings.model_dump()
-        )
+    for field in _SETTINGS_FIELDS:
+        value = getattr(config_data, field)
+        if value is not None:
+            setattr(db_config, field, encryption_service.encrypt_dict(value.model_dump()))
 
     try:
         db.add(db_config)
         db.commit()
-        db.refresh(db_config)
     except IntegrityError:
         db.rollback()
         raise HTTPException(
@@ -156,6 +191,7 @@ def create_mailbox_config(
             detail=f"Mailbox configuration with name '{config_data.name}' already exists"
         )
 
+    invalidate_config_counts()
     return _serialize_config_for_response(db_config)
 
 
@@ -167,7 +203,7 @@ def update_mailbox_config(
     _user: str = Depends(get_current_user),
 ):
     """Update an existing mailbox configuration."""
-    db_config = db.query(MailboxConfig).filter(MailboxConfig.id == config_id).first()
+    db_config = db.get(MailboxConfig, config_id)
 
     if not db_config:
         raise HTTPException(
@@ -175,37 +211,24 @@ def update_mailbox_config(
             detail=f"Mailbox configuration with ID {config_id} not found"
         )
 
-    # Update basic fields
-    update_data = config_data.model_dump(exclude_unset=True)
+    # Dump once and drive both updates from the result. Settings blocks are
+    # dumped in full (defaults included); only top-level fields the client
+    # actually sent are applied.
+    update_data = config_data.model_dump()
+    fields_set = config_data.model_fields_set
 
-    for field in ["name", "enabled", "delete_after_processing", "watch_interval"]:
-        if field in update_data:
+    # Update basic fields
+    for field in ("name", "enabled", "delete_after_processing", "watch_interval"):
+        if field in fields_set:
             setattr(db_config, field, update_data[field])
 
     # Update encrypted settings if provided
-    if config_data.imap_settings is not None:
-        db_config.imap_settings = encryption_service.encrypt_dict(
-            config_data.imap_settings.model_dump()
-        )
-
-    if config_data.msgraph_settings is not None:
-        db_config.msgraph_settings = encryption_service.encrypt_dict(
-            config_data.msgraph_settings.model_dump()
-        )
-
-    if config_data.gmail_settings is not None:
-        db_config.gmail_settings = encryption_service.encrypt_dict(
-            config_data.gmail_settings.model_dump()
-        )
-
-    if config_data.maildir_settings is not None:
-        db_config.maildir_settings = encryption_service.encrypt_dict(
-            config_data.maildir_settings.model_dump()
-        )
+    for field in _SETTINGS_FIELDS:
+        if update_data[field] is not None:
+            setattr(db_config, field, encryption_service.encrypt_dict(update_data[field]))
 
     try:
         db.commit()
-        db.refresh(db_config)
     except IntegrityError:
         db.rollback()
         raise HTTPException(
@@ -223,24 +246,22 @@ def delete_mailbox_config(
     _user: str = Depends(get_current_user),
 ):
     """Delete a mailbox configuration."""
-    db_config = db.query(MailboxConfig).filter(MailboxConfig.id == config_id).first()
+    result = db.execute(delete(MailboxConfig).where(MailboxConfig.id == config_id))
+    db.commit()
 
-    if not db_config:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Mailbox configuration with ID {config_id} not found"
         )
 
-    db.delete(db_config)
-    db.commit()
+    invalidate_config_counts()
 
     return None
 
 
 @router.post("/{config_id}/test", response_model=ConnectionTestResponse)
-@limiter.limit("10/minute")
 def test_mailbox_connection(
-    request: Request,
     config_id: int,
     db: Session = Depends(get_db),
     _user: str = Depends(get_current_user),
@@ -250,7 +271,7 @@ def test_mailbox_connection(
 
     Attempts to connect and list messages in the reports folder.
     """
-    config = db.query(MailboxConfig).filter(MailboxConfig.id == config_id).first()
+    config = db.get(MailboxConfig, config_id)
     if not config:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -5,9 +5,10 @@ from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.dependencies.auth import get_current_user
 from app.models.mailbox_config import MailboxConfig
 from app.models.monitoring_job import MonitoringJob
@@ -62,11 +63,21 @@ def _get_monitoring_service():
 
 
 @router.get("/status", response_model=MonitoringStatusResponse)
-def get_monitoring_status(db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
+async def get_monitoring_status(
+    db: AsyncSession = Depends(get_async_db),
+    _user: str = Depends(get_current_user),
+):
     """Get overall monitoring service status."""
     svc = _get_monitoring_service()
-    total = db.query(MonitoringJob).count()
-    active = db.query(MonitoringJob).filter(MonitoringJob.status == "running").count()
+    # Both counts in one scan; CASE rather than FILTER so MySQL works too
+    total, active = (
+        await db.execute(
+            select(
+                func.count(),
+                func.count(case((MonitoringJob.status == "running", 1))),
+            ).select_from(MonitoringJob)
+        )
+    ).one()
     return MonitoringStatusResponse(
         is_running=svc.is_running(),
         active_jobs=active,
@@ -75,23 +86,24 @@ def get_monitoring_status(db: Session = Depends(get_db), _user: str = Depends(ge
 
 
 @router.get("/jobs", response_model=List[MonitoringJobResponse])
-def list_monitoring_jobs(db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
+async def list_monitoring_jobs(
+    db: AsyncSession = Depends(get_async_db),
+    _user: str = Depends(get_current_user),
+):
     """List all monitoring jobs."""
-    jobs = db.query(MonitoringJob).all()
-    return jobs
+    jobs = await db.scalars(select(MonitoringJob))
+    return jobs.all()
 
 
 @router.get("/jobs/{mailbox_config_id}", response_model=MonitoringJobResponse)
-def get_monitoring_job(
+async def get_monitoring_job(
     mailbox_config_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Get monitoring job for a specific mailbox config."""
-    job = (
-        db.query(MonitoringJob)
-        .filter(MonitoringJob.mailbox_config_id == mailbox_config_id)
-        .first()
+    job = await db.scalar(
+        select(MonitoringJob).where(MonitoringJob.mailbox_config_id == mailbox_config_id)
     )
     if not job:
         raise HTTPException(
@@ -105,13 +117,19 @@ def get_monitoring_job(
 async def start_monitoring(
     mailbox_config_id: int,
     request: MonitoringJobCreate = MonitoringJobCreate(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Start monitoring a mailbox configuration."""
     svc = _get_monitoring_service()
 
-    config = db.query(MailboxConfig).filter(MailboxConfig.id == mailbox_config_id).first()
+    # Only these columns are needed; skip the encrypted settings blobs
+    config = (
+        await db.execute(
+            select(MailboxConfig.name, MailboxConfig.enabled, MailboxConfig.watch_interval)
+            .where(MailboxConfig.id == mailbox_config_id)
+        )
+    ).first()
     if not config:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -125,10 +143,8 @@ async def start_monitoring(
         )
 
     # Create or update monitoring job record
-    job = (
-        db.query(MonitoringJob)
-        .filter(MonitoringJob.mailbox_config_id == mailbox_config_id)
-        .first()
+    job = await db.scalar(
+        select(MonitoringJob).where(MonitoringJob.mailbox_config_id == mailbox_config_id)
     )
     if not job:
         job = MonitoringJob(
@@ -140,11 +156,15 @@ async def start_monitoring(
     job.status = "running"
     job.watch_mode = request.watch_mode
     job.scheduler_job_id = f"monitor_mailbox_{mailbox_config_id}"
-    db.commit()
-    db.refresh(job)
 
-    # Add to APScheduler
+    # Schedule before committing, so a job the scheduler rejects never
+    # reaches the database as "running"; the session rolls it back.
     await svc.add_monitoring_job(mailbox_config_id, config.watch_interval)
+    try:
+        await db.commit()
+    except Exception:
+        await svc.remove_monitoring_job(mailbox_config_id)
+        raise
 
     logger.info(f"Started monitoring for mailbox config {mailbox_config_id} ({config.name})")
     return job
@@ -153,16 +173,14 @@ async def start_monitoring(
 @router.post("/jobs/{mailbox_config_id}/stop", response_model=MonitoringJobResponse)
 async def stop_monitoring(
     mailbox_config_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Stop monitoring a mailbox configuration."""
     svc = _get_monitoring_service()
 
-    job = (
-        db.query(MonitoringJob)
-        .filter(MonitoringJob.mailbox_config_id == mailbox_config_id)
-        .first()
+    job = await db.scalar(
+        select(MonitoringJob).where(MonitoringJob.mailbox_config_id == mailbox_config_id)
     )
     if not job:
         raise HTTPException(
@@ -174,8 +192,7 @@ async def stop_monitoring(
     await svc.remove_monitoring_job(mailbox_config_id)
 
     job.status = "stopped"
-    db.commit()
-    db.refresh(job)
+    await db.commit()
 
     logger.info(f"Stopped monitoring for mailbox config {mailbox_config_id}")
     return job
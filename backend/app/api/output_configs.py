@@ -1,10 +1,13 @@
 """Output configuration API endpoints."""
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
+from typing import List, Optional
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
-from app.db.session import get_db
+from app.db.session import get_async_db
+from app.api.dashboard import invalidate_config_counts
 from app.dependencies.auth import get_current_user
 from app.models.output_config import OutputConfig
 from app.schemas.output_config import (
@@ -12,31 +15,48 @@ from app.schemas.output_config import (
     OutputConfigUpdate,
     OutputConfigResponse
 )
-from app.services.encryption_service import EncryptionService
+from app.services.cache_service import get_cache
+from app.services.encryption_service import encryption_service
 
 router = APIRouter(prefix="/api/configs/outputs", tags=["Output Configurations"])
-encryption_service = EncryptionService()
+
+# Detail responses are cached (and dropped on update/delete) to skip the
+# SELECT and settings decryption on repeated lookups
+CONFIG_CACHE_TTL_SECONDS = 60
+
+
+def _cache_key(config_id: int) -> str:
+    """Response cache key for a single output config."""
+    return f"output_config:{config_id}"
+
+
+# Schema field holding the settings block for each output type
+_SETTINGS_FIELDS = {
+    output_type: f"{output_type}_settings"
+    for output_type in (
+        "elasticsearch", "opensearch", "splunk", "kafka",
+        "s3", "syslog", "gelf", "webhook",
+    )
+}
+
+_SENSITIVE_KEYS = frozenset({"password", "token", "secret_access_key", "api_key"})
 
 
 def _mask_sensitive_fields(settings: dict, output_type: str) -> dict:
-    """Mask sensitive fields in output settings."""
-    masked = settings.copy()
+    """Mask sensitive fields in decrypted output settings (in-place)."""
+    for key in _SENSITIVE_KEYS & settings.keys():
+        if settings[key]:
+            settings[key] = "***ENCRYPTED***"
 
-    # Common sensitive fields
-    if "password" in masked and masked["password"]:
-        masked["password"] = "***ENCRYPTED***"
-    if "token" in masked and masked["token"]:
-        masked["token"] = "***ENCRYPTED***"
-    if "secret_access_key" in masked and masked["secret_access_key"]:
-        masked["secret_access_key"] = "***ENCRYPTED***"
-    if "api_key" in masked and masked["api_key"]:
-        masked["api_key"] = "***ENCRYPTED***"
+    return settings
 
-    return masked
 
+def _serialize_config_for_response(config: OutputConfig, settings: Optional[dict] = None) -> dict:
+    """Serialize output config for API response (decrypt and mask passwords).
 
-def _serialize_config_for_response(config: OutputConfig) -> dict:
-    """Serialize output config for API response (decrypt and mask passwords)."""
+    ``settings`` may carry the already-decrypted settings, e.g. from a
+    batch decrypt in the list endpoint.
+    """
     response_data = {
         "id": config.id,
         "name": config.name,
@@ -51,51 +71,62 @@ def _serialize_config_for_response(config: OutputConfig) -> dict:
 
     # Decrypt settings and add to response
     if config.settings:
-        settings = encryption_service.decrypt_dict(config.settings)
+        if settings is None:
+            settings = encryption_service.decrypt_dict(config.settings)
         masked_settings = _mask_sensitive_fields(settings, config.type)
-        response_data[f"{config.type}_settings"] = masked_settings
+        response_data[_SETTINGS_FIELDS[config.type]] = masked_settings
 
     return response_data
 
 
 @router.get("/", response_model=List[OutputConfigResponse])
-def list_output_configs(
+async def list_output_configs(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """List all output configurations."""
-    configs = db.query(OutputConfig).offset(skip).limit(limit).all()
-    return [_serialize_config_for_response(config) for config in configs]
+    configs = (await db.scalars(select(OutputConfig).offset(skip).limit(limit))).all()
+    all_settings = encryption_service.decrypt_many([config.settings for config in configs])
+    return [
+        _serialize_config_for_response(config, settings)
+        for config, settings in zip(configs, all_settings)
+    ]
 
 
 @router.get("/{config_id}", response_model=OutputConfigResponse)
-def get_output_config(
+async def get_output_config(
     config_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Get a specific output configuration by ID."""
-    config = db.query(OutputConfig).filter(OutputConfig.id == config_id).first()
-    if not config:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Output configuration with ID {config_id} not found"
-        )
-    return _serialize_config_for_response(config)
+    cache = get_cache()
+    body = await cache.get(_cache_key(config_id))
+    if body is None:
+        config = await db.get(OutputConfig, config_id)
+        if not config:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Output configuration with ID {config_id} not found"
+            )
+        response = OutputConfigResponse.model_validate(_serialize_config_for_response(config))
+        body = orjson.dumps(response.model_dump(mode="json"))
+        await cache.set(_cache_key(config_id), body, CONFIG_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/", response_model=OutputConfigResponse, status_code=status.HTTP_201_CREATED)
-def create_output_config(
+async def create_output_config(
     config_data: OutputConfigCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Create a new output configuration."""
 
     # Validate that appropriate settings are provided for the output type
-    settings_attr = f"{config_data.type}_settings"
+    settings_attr = _SETTINGS_FIELDS[config_data.type]
     settings_value = getattr(config_data, settings_attr, None)
 
     if not settings_value:
@@ -117,27 +148,27 @@ def create_output_config(
 
     try:
         db.add(db_config)
-        db.commit()
-        db.refresh(db_config)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Output configuration with name '{config_data.name}' already exists"
         )
 
+    invalidate_config_counts()
     return _serialize_config_for_response(db_config)
 
 
 @router.put("/{config_id}", response_model=OutputConfigResponse)
-def update_output_config(
+async def update_output_config(
     config_id: int,
     config_data: OutputConfigUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Update an existing output configuration."""
-    db_config = db.query(OutputConfig).filter(OutputConfig.id == config_id).first()
+    db_config = await db.get(OutputConfig, config_id)
 
     if not db_config:
         raise HTTPException(
@@ -152,49 +183,43 @@ def update_output_config(
         if field in update_data:
             setattr(db_config, field, update_data[field])
 
-    # Update encrypted settings if any type-specific settings are provided
-    settings_fields = [
-        "elasticsearch_settings", "opensearch_settings", "splunk_settings",
-        "kafka_settings", "s3_settings", "syslog_settings", "gelf_settings", "webhook_settings"
-    ]
-
-    for field in settings_fields:
-        if field in update_data and update_data[field] is not None:
-            settings_value = update_data[field]
-            if isinstance(settings_value, BaseModel):
-                settings_value = settings_value.model_dump()
-            db_config.settings = encryption_service.encrypt_dict(settings_value)
-            break
+    # Update encrypted settings if provided for this config's type (the type
+    # itself can't change). Dumped in full, like on create, so omitted fields
+    # get their defaults rather than being dropped from the stored settings.
+    settings_value = getattr(config_data, _SETTINGS_FIELDS[db_config.type], None)
+    if settings_value is not None:
+        db_config.settings = encryption_service.encrypt_dict(settings_value.model_dump())
 
     try:
-        db.commit()
-        db.refresh(db_config)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail=f"Output configuration with name '{config_data.name}' already exists"
         )
 
+    await get_cache().delete(_cache_key(config_id))
     return _serialize_config_for_response(db_config)
 
 
 @router.delete("/{config_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_output_config(
+async def delete_output_config(
     config_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Delete an output configuration."""
-    db_config = db.query(OutputConfig).filter(OutputConfig.id == config_id).first()
+    result = await db.execute(delete(OutputConfig).where(OutputConfig.id == config_id))
+    await db.commit()
 
-    if not db_config:
+    if result.rowcount == 0:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Output configuration with ID {config_id} not found"
         )
 
-    db.delete(db_config)
-    db.commit()
+    await get_cache().delete(_cache_key(config_id))
+    invalidate_config_counts()
 
     return None
@@ -1,31 +1,52 @@
 """Parsing API endpoints and schemas."""
+import asyncio
+import base64
 import logging
 import re
+import secrets
 import shutil
-import uuid
 from pathlib import Path
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Dict, Tuple
 from datetime import datetime
 
 # Maximum upload size for DMARC report files (50 MB)
 _MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
 
-from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Query, status
-from pydantic import BaseModel, Field
+_ALLOWED_UPLOAD_EXTENSIONS = frozenset({".xml", ".gz", ".zip", ".eml", ".msg"})
+_ALLOWED_UPLOAD_EXTENSIONS_STR = ", ".join(sorted(_ALLOWED_UPLOAD_EXTENSIONS))
+
+# Characters replaced when sanitizing uploaded filenames
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^\w.\-]")
+
+# Stored reports are never modified, so their detail responses cache well
+REPORT_CACHE_TTL_SECONDS = 300
+
+import aiofiles
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Response, UploadFile, File, Query, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, TypeAdapter
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
-from app.db.session import get_db
+from app.api.dashboard import invalidate_dashboard_stats
+from app.db.session import create_async_session, get_async_db, get_db
 from app.dependencies.auth import get_current_user
+from app.dependencies.rate_limit import RateLimiter
 from app.models.mailbox_config import MailboxConfig
 from app.models.parse_job import ParseJob
 from app.models.parsed_report import ParsedReport
+from app.services.cache_service import get_cache
 from app.services.parsing_service import parsing_service
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Upload directory, resolved once; created at startup by the app lifespan
+UPLOADS_DIR = (Path(settings.data_dir) / "uploads").resolve()
+
 # ---------- Schemas ----------
 
 
@@ -63,8 +84,8 @@ class ParseJobResponse(BaseModel):
         from_attributes = True
 
 
-class ParsedReportResponse(BaseModel):
-    """Response schema for a parsed report."""
+class ParsedReportSummary(BaseModel):
+    """Parsed report columns, without the report itself."""
 
     id: int
     parse_job_id: Optional[int] = None
@@ -74,18 +95,29 @@ class ParsedReportResponse(BaseModel):
     domain: Optional[str] = None
     date_begin: Optional[datetime] = None
     date_end: Optional[datetime] = None
-    report_json: Optional[Any] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
 
+class ParsedReportResponse(ParsedReportSummary):
+    """Response schema for a parsed report."""
+
+    report_json: Optional[Dict[str, Any]] = None
+
+
 class ParsedReportListResponse(BaseModel):
-    """Paginated list of parsed reports."""
+    """Page of parsed reports, newest first.
+
+    When ``has_more`` is set, pass ``next_cursor`` back as ``cursor`` to
+    fetch the following page. ``total`` is only counted on request.
+    """
 
-    total: int
     items: List[ParsedReportResponse]
+    has_more: bool = False
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
 
 
 class ConnectionTestResponse(BaseModel):
@@ -96,10 +128,24 @@ class ConnectionTestResponse(BaseModel):
     details: Optional[dict] = None
 
 
+# Built once; used to validate and serialize job lists in a single pass
+_PARSE_JOB_LIST = TypeAdapter(List[ParseJobResponse])
+
+
+def _report_body(report: ParsedReport) -> dict:
+    """ParsedReportResponse data for report, ready for orjson.dumps.
+
+    The stored ``report_json`` text is embedded as-is, so the report goes
+    out as a JSON object without being parsed and re-serialized.
+    """
+    data = ParsedReportSummary.model_validate(report).model_dump(mode="json")
+    data["report_json"] = orjson.Fragment(report.report_json) if report.report_json else None
+    return data
+
+
 # ---------- Router ----------
 
 router = APIRouter(prefix="/api/parse", tags=["Parsing"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.post("/mailbox/{config_id}", response_model=ParseJobResponse)
@@ -115,7 +161,7 @@ def parse_from_mailbox(
     Connects to the mailbox, fetches reports, parses them,
     and stores results in the database.
     """
-    config = db.query(MailboxConfig).filter(MailboxConfig.id == config_id).first()
+    config = db.get(MailboxConfig, config_id)
     if not config:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -135,13 +181,17 @@ def parse_from_mailbox(
         since=request.since,
         test_mode=request.test_mode,
     )
+    invalidate_dashboard_stats()
     return job
 
 
-@router.post("/upload", response_model=ParseJobResponse, status_code=status.HTTP_201_CREATED)
-@limiter.limit("10/minute")
-def parse_uploaded_file(
-    request: Request,
+@router.post(
+    "/upload",
+    response_model=ParseJobResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+)
+async def parse_uploaded_file(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     _user: str = Depends(get_current_user),
@@ -151,41 +201,39 @@ def parse_uploaded_file(
 
     Supports .xml, .gz, .zip, .eml, and .msg files.
     """
-    allowed_extensions = {".xml", ".gz", ".zip", ".eml", ".msg"}
     file_ext = Path(file.filename).suffix.lower() if file.filename else ""
-    if file_ext not in allowed_extensions:
+    if file_ext not in _ALLOWED_UPLOAD_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=(
                 f"Unsupported file type '{file_ext}'. "
-                f"Allowed: {', '.join(sorted(allowed_extensions))}"
+                f"Allowed: {_ALLOWED_UPLOAD_EXTENSIONS_STR}"
             ),
         )
 
     # Save upload to data_dir/uploads/
-    uploads_dir = Path(settings.data_dir) / "uploads"
-    uploads_dir.mkdir(parents=True, exist_ok=True)
-
     # Sanitize filename: keep only safe characters + extension
+    # A 64-bit random prefix keeps stored names unique without a full UUID
     raw_name = file.filename or "upload"
-    sanitized_name = re.sub(r"[^\w.\-]", "_", Path(raw_name).stem)[:64]
-    safe_filename = f"{uuid.uuid4().hex}_{sanitized_name}{file_ext}"
-    file_path = uploads_dir / safe_filename
+    sanitized_name = _UNSAFE_FILENAME_CHARS.sub("_", Path(raw_name).stem)[:64]
+    safe_filename = f"{secrets.token_hex(8)}_{sanitized_name}{file_ext}"
+    file_path = UPLOADS_DIR / safe_filename
 
     try:
-        # Stream-write with size limit
+        # Stream-write with size limit, without tying up a worker thread
         total_written = 0
-        with open(file_path, "wb") as buffer:
-            while chunk := file.file.read(8192):
+        async with aiofiles.open(file_path, "wb") as buffer:
+            while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
                 total_written += len(chunk)
                 if total_written > _MAX_UPLOAD_BYTES:
-                    buffer.close()
-                    file_path.unlink(missing_ok=True)
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail=f"File exceeds maximum upload size of {_MAX_UPLOAD_BYTES // (1024*1024)} MB",
-                    )
-                buffer.write(chunk)
+                    break
+                await buffer.write(chunk)
+        if total_written > _MAX_UPLOAD_BYTES:
+            file_path.unlink(missing_ok=True)
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds maximum upload size of {_MAX_UPLOAD_BYTES // (1024*1024)} MB",
+            )
     except HTTPException:
         raise
     except Exception as e:
@@ -195,39 +243,47 @@ def parse_uploaded_file(
             detail="Failed to save uploaded file.",
         )
 
-    job = parsing_service.parse_from_file(
+    # Parsing is blocking work on a sync session; keep it off the event loop
+    job = await run_in_threadpool(
+        parsing_service.parse_from_file,
         db=db,
         file_path=str(file_path),
         original_filename=file.filename or "unknown",
     )
+    invalidate_dashboard_stats()
     return job
 
 
 @router.get("/jobs", response_model=List[ParseJobResponse])
-def list_parse_jobs(
+async def list_parse_jobs(
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     status_filter: Optional[str] = Query(None, alias="status"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
-    """List parse jobs with optional status filtering."""
-    query = db.query(ParseJob)
+    """List parse jobs with optional status filtering.
+
+    Rows are validated and serialized in one pass and returned as a ready
+    response, skipping FastAPI's second validation against response_model.
+    """
+    query = select(ParseJob)
     if status_filter:
-        query = query.filter(ParseJob.status == status_filter)
+        query = query.where(ParseJob.status == status_filter)
     query = query.order_by(ParseJob.created_at.desc())
-    jobs = query.offset(skip).limit(limit).all()
-    return jobs
+    jobs = await db.scalars(query.offset(skip).limit(limit))
+    body = _PARSE_JOB_LIST.dump_json(_PARSE_JOB_LIST.validate_python(jobs.all(), from_attributes=True))
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/jobs/{job_id}", response_model=ParseJobResponse)
-def get_parse_job(
+async def get_parse_job(
     job_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Get a specific parse job by ID."""
-    job = db.query(ParseJob).filter(ParseJob.id == job_id).first()
+    job = await db.get(ParseJob, job_id)
     if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -236,51 +292,118 @@ def get_parse_job(
     return job
 
 
+async def _count(count_query) -> int:
+    """Run a COUNT query on a short-lived session of its own."""
+    async with create_async_session() as db:
+        return await db.scalar(count_query)
+
+
+def _encode_report_cursor(report: ParsedReport) -> str:
+    """Encode a report's (created_at, id) sort position as an opaque cursor."""
+    raw = f"{report.created_at.isoformat()}|{report.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_report_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor from _encode_report_cursor, raising 422 if malformed."""
+    try:
+        created_at, report_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(report_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid pagination cursor",
+        )
+
+
 @router.get("/reports", response_model=ParsedReportListResponse)
-def list_parsed_reports(
-    skip: int = Query(0, ge=0),
+async def list_parsed_reports(
+    skip: int = Query(0, ge=0, description="Offset pagination; ignored when cursor is set"),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also count all matching reports"),
     report_type: Optional[str] = Query(None, description="Filter by report type"),
     domain: Optional[str] = Query(None, description="Filter by domain"),
     org_name: Optional[str] = Query(None, description="Filter by organization name"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
-    """List parsed reports with filtering and pagination."""
-    query = db.query(ParsedReport)
+    """List parsed reports with filtering and pagination.
+
+    Pages are ordered by (created_at, id) descending. With ``cursor`` the
+    page starts right after the given position (keyset pagination), so
+    cost doesn't grow with page depth the way ``skip`` does. The COUNT
+    for ``total`` is a full scan of the matching rows and only runs when
+    ``include_total`` is set.
+    """
+    query = select(ParsedReport)
     if report_type:
-        query = query.filter(ParsedReport.report_type == report_type)
+        query = query.where(ParsedReport.report_type == report_type)
     if domain:
         escaped = domain.replace("%", r"\%").replace("_", r"\_")
-        query = query.filter(ParsedReport.domain.ilike(f"%{escaped}%"))
+        query = query.where(ParsedReport.domain.ilike(f"%{escaped}%"))
     if org_name:
         escaped = org_name.replace("%", r"\%").replace("_", r"\_")
-        query = query.filter(ParsedReport.org_name.ilike(f"%{escaped}%"))
-
-    total = query.count()
-    items = (
-        query.order_by(ParsedReport.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+        query = query.where(ParsedReport.org_name.ilike(f"%{escaped}%"))
+
+    count_query = select(func.count()).select_from(query.subquery())
 
-    return ParsedReportListResponse(total=total, items=items)
+    if cursor:
+        cursor_created_at, cursor_id = _decode_report_cursor(cursor)
+        query = query.where(
+            or_(
+                ParsedReport.created_at < cursor_created_at,
+                and_(ParsedReport.created_at == cursor_created_at, ParsedReport.id < cursor_id),
+            )
+        )
+    else:
+        query = query.offset(skip)
+
+    # Fetch one extra row to learn whether another page follows
+    page_query = query.order_by(ParsedReport.created_at.desc(), ParsedReport.id.desc()).limit(limit + 1)
+
+    total = None
+    if include_total:
+        # The count runs on its own session so both queries are in flight at once
+        total, items = await asyncio.gather(_count(count_query), db.scalars(page_query))
+    else:
+        items = await db.scalars(page_query)
+    items = items.all()
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = _encode_report_cursor(items[-1]) if has_more else None
+
+    page = {
+        "items": [_report_body(report) for report in items],
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+        "total": total,
+    }
+    # Already validated by _report_body; skip FastAPI's re-validation
+    return Response(content=orjson.dumps(page), media_type="application/json")
 
 
 @router.get("/reports/{report_id}", response_model=ParsedReportResponse)
-def get_parsed_report(
+async def get_parsed_report(
     report_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
-    """Get a specific parsed report by ID."""
-    report = (
-        db.query(ParsedReport).filter(ParsedReport.id == report_id).first()
-    )
-    if not report:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Parsed report with ID {report_id} not found",
-        )
-    return report
+    """Get a specific parsed report by ID.
+
+    The serialized response is cached for REPORT_CACHE_TTL_SECONDS.
+    """
+    cache = get_cache()
+    cache_key = f"report:{report_id}"
+    body = await cache.get(cache_key)
+    if body is None:
+        report = await db.get(ParsedReport, report_id)
+        if not report:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Parsed report with ID {report_id} not found",
+            )
+        body = orjson.dumps(_report_body(report))
+        await cache.set(cache_key, body, REPORT_CACHE_TTL_SECONDS)
+    return Response(content=body, media_type="application/json")
@@ -1,38 +1,53 @@
 """Settings API endpoints (database management)."""
 import logging
-import os
-from pathlib import Path
+import threading
+import uuid
+from typing import Dict
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.engine import Engine
 
+from app.api.dashboard import invalidate_config_counts, invalidate_dashboard_stats
+from app.api.setup import invalidate_setup_status
 from app.config import settings
+from app.db.engine_cache import get_engine
 from app.dependencies.auth import get_current_user
+from app.dependencies.rate_limit import RateLimiter
 from app.schemas.settings import (
     DatabaseTestRequest,
     DatabaseTestResponse,
     DatabaseMigrateRequest,
-    DatabaseMigrateResponse,
+    DatabaseMigrationStatus,
     DatabaseInfoResponse,
     DatabasePurgeResponse,
     build_database_url,
     mask_database_url,
 )
+from app.services.cache_service import get_cache
 from app.services.database_migration_service import migration_service
+from app.utils.envfile import update_env
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/settings", tags=["Settings"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get("/database", response_model=DatabaseInfoResponse)
-def get_database_info(_user: str = Depends(get_current_user)):
-    """Get information about the current database."""
+async def get_database_info(
+    exact: bool = Query(False, description="Run exact COUNT(*) instead of using row estimates"),
+    _user: str = Depends(get_current_user),
+):
+    """Get information about the current database.
+
+    On PostgreSQL and MySQL, table counts are the database's row estimates
+    unless ``exact`` is set.
+    """
     current_url = settings.effective_database_url
     try:
-        table_counts = migration_service.get_table_counts(current_url)
+        table_counts = await run_in_threadpool(
+            migration_service.get_table_counts, current_url, exact=exact
+        )
     except Exception as e:
         logger.error(f"Failed to get table counts: {e}")
         table_counts = {}
@@ -41,12 +56,16 @@ def get_database_info(_user: str = Depends(get_current_user)):
         db_type=settings.database_type,
         connection_string=mask_database_url(current_url),
         table_counts=table_counts,
+        counts_estimated=not exact and settings.database_type != "sqlite",
     )
 
 
-@router.post("/database/test", response_model=DatabaseTestResponse)
-@limiter.limit("10/minute")
-def test_database_connection(request: Request, test_request: DatabaseTestRequest, _user: str = Depends(get_current_user)):
+@router.post(
+    "/database/test",
+    response_model=DatabaseTestResponse,
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+)
+async def test_database_connection(test_request: DatabaseTestRequest, _user: str = Depends(get_current_user)):
     """Test connectivity to a target database."""
     try:
         target_url = build_database_url(
@@ -56,17 +75,33 @@ def test_database_connection(request: Request, test_request: DatabaseTestRequest
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    result = migration_service.test_connection(target_url)
+    result = await run_in_threadpool(migration_service.test_connection, target_url)
     return DatabaseTestResponse(**result)
 
 
-@router.post("/database/migrate", response_model=DatabaseMigrateResponse)
-@limiter.limit("3/minute")
-def migrate_database(request: Request, migrate_request: DatabaseMigrateRequest, _user: str = Depends(get_current_user)):
-    """Migrate data from the current database to a new target database.
+# Background migrations by job ID. Only the latest is kept; jobs live in
+# this process, which is also the one running the migration.
+_migration_jobs: Dict[str, dict] = {}
+_migration_jobs_lock = threading.Lock()
+
 
-    After a successful migration the .env file is updated with the new
-    PARSEDMARC_DATABASE_URL so the application uses it on the next restart.
+@router.post(
+    "/database/migrate",
+    response_model=DatabaseMigrationStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(RateLimiter(times=3, seconds=60))],
+)
+async def migrate_database(
+    migrate_request: DatabaseMigrateRequest,
+    background_tasks: BackgroundTasks,
+    _user: str = Depends(get_current_user),
+):
+    """Start migrating data from the current database to a new target database.
+
+    The migration runs in the background; poll
+    ``GET /database/migrate/{job_id}`` for progress. After a successful
+    migration the .env file is updated with the new PARSEDMARC_DATABASE_URL
+    so the application uses it on the next restart.
     """
     try:
         target_url = build_database_url(
@@ -76,62 +111,107 @@ def migrate_database(request: Request, migrate_request: DatabaseMigrateRequest,
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
-    # Verify target is reachable first
-    test_result = migration_service.test_connection(target_url)
+    # Verify target is reachable first; a failed probe leaves no engine
+    # cached. The migration then reuses the probe's engine and the
+    # connection it returned to the pool.
+    test_result = await run_in_threadpool(migration_service.test_connection, target_url)
     if not test_result["success"]:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Cannot connect to target database: {test_result['message']}",
         )
+    target_engine = get_engine(target_url)
 
-    source_url = settings.effective_database_url
-
-    if migrate_request.migrate_data:
-        result = migration_service.migrate(source_url, target_url)
-    else:
-        # Just create empty tables in the target
-        from sqlalchemy import create_engine
-        from app.db.session import Base
-        target_engine = create_engine(target_url, pool_pre_ping=True)
-        try:
-            Base.metadata.create_all(target_engine)
-            result = {
-                "success": True,
-                "message": "Tables created in target database (no data migrated).",
-                "tables_migrated": 0,
-                "row_counts": {},
-            }
-        except Exception as e:
+    with _migration_jobs_lock:
+        if any(job["status"] == "running" for job in _migration_jobs.values()):
             raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to create tables in target database.",
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A database migration is already running.",
             )
-        finally:
-            target_engine.dispose()
-
-    if not result["success"]:
+        _migration_jobs.clear()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "running",
+            "message": f"Migration to {migrate_request.db_type} started.",
+            "current_table": None,
+            "tables_migrated": 0,
+            "row_counts": {},
+            "restart_required": False,
+        }
+        _migration_jobs[job["job_id"]] = job
+
+    background_tasks.add_task(_run_migration, job, target_url, target_engine, migrate_request)
+    return job
+
+
+@router.get("/database/migrate/{job_id}", response_model=DatabaseMigrationStatus)
+async def get_migration_status(job_id: str, _user: str = Depends(get_current_user)):
+    """Get the progress of a background database migration."""
+    job = _migration_jobs.get(job_id)
+    if job is None:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=result["message"],
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Migration job {job_id} not found",
         )
+    # Copy: the migration thread keeps updating row_counts
+    return dict(job, row_counts=dict(job["row_counts"]))
 
-    # Update .env with the new database URL
-    _update_env("PARSEDMARC_DATABASE_URL", target_url)
-    logger.info(f"Database migrated to {migrate_request.db_type}. Restart required.")
 
-    return DatabaseMigrateResponse(
-        success=True,
-        message=f"Migration to {migrate_request.db_type} completed. Restart the application to use the new database.",
-        tables_migrated=result.get("tables_migrated", 0),
-        row_counts=result.get("row_counts"),
-        restart_required=True,
-    )
+async def _run_migration(
+    job: dict, target_url: str, target_engine: Engine, migrate_request: DatabaseMigrateRequest
+) -> None:
+    """Run a migration started by migrate_database, recording progress on job."""
 
+    def on_progress(table_name: str, rows_copied: int) -> None:
+        job["current_table"] = table_name
+        job["row_counts"][table_name] = rows_copied
 
-@router.post("/database/purge", response_model=DatabasePurgeResponse)
-@limiter.limit("3/minute")
-def purge_database(
-    request: Request,
+    try:
+        if migrate_request.migrate_data:
+            result = await run_in_threadpool(
+                migration_service.migrate,
+                settings.effective_database_url,
+                target_url,
+                batch_size=migrate_request.batch_size,
+                on_progress=on_progress,
+                target_engine=target_engine,
+            )
+        else:
+            # Just create empty tables in the target
+            result = await run_in_threadpool(
+                migration_service.create_schema, target_url, target_engine=target_engine
+            )
+
+        if not result["success"]:
+            job.update(status="failed", message=result["message"], current_table=None)
+            return
+
+        # Update .env with the new database URL
+        await run_in_threadpool(update_env, {"PARSEDMARC_DATABASE_URL": target_url})
+        # Cached bodies come from the old database; Redis-backed entries
+        # would outlive the restart and be served for the new one
+        await get_cache().clear()
+        logger.info(f"Database migrated to {migrate_request.db_type}. Restart required.")
+
+        job.update(
+            status="completed",
+            message=f"Migration to {migrate_request.db_type} completed. Restart the application to use the new database.",
+            current_table=None,
+            tables_migrated=result.get("tables_migrated", 0),
+            row_counts=result.get("row_counts") or {},
+            restart_required=True,
+        )
+    except Exception as e:
+        logger.error(f"Database migration failed: {e}", exc_info=True)
+        job.update(status="failed", message="Database migration failed.", current_table=None)
+
+
+@router.post(
+    "/database/purge",
+    response_model=DatabasePurgeResponse,
+    dependencies=[Depends(RateLimiter(times=3, seconds=60))],
+)
+async def purge_database(
     confirm: bool = Query(False, description="Must be true to confirm purge"),
     _user: str = Depends(get_current_user),
 ):
@@ -153,7 +233,14 @@ def purge_database(
         )
 
     current_url = settings.effective_database_url
-    result = migration_service.purge_all_data(current_url)
+    result = await run_in_threadpool(migration_service.purge_all_data, current_url)
+    # The purge empties setup_status too
+    invalidate_setup_status()
+    invalidate_dashboard_stats()
+    invalidate_config_counts()
+    # Cached report and output config bodies describe rows that are gone,
+    # and SQLite hands their IDs out again
+    await get_cache().clear()
 
     if not result["success"]:
         raise HTTPException(
@@ -166,31 +253,3 @@ def purge_database(
         message=result["message"],
         rows_deleted=result.get("rows_deleted"),
     )
-
-
-def _update_env(key: str, value: str):
-    """Update or add a key=value pair in the .env file."""
-    env_path = Path(__file__).parent.parent.parent.parent / ".env"
-
-    env_content = ""
-    if env_path.exists():
-        with open(env_path, "r") as f:
-            env_content = f.read()
-
-    lines = env_content.split("\n")
-    updated = False
-    for i, line in enumerate(lines):
-        if line.startswith(f"{key}="):
-            lines[i] = f"{key}={value}"
-            updated = True
-            break
-
-    if not updated:
-        lines.append(f"{key}={value}")
-
-    with open(env_path, "w") as f:
-        f.write("\n".join(lines))
-    try:
-        os.chmod(env_path, 0o600)
-    except OSError:
-        pass  # chmod not supported on Windows
@@ -1,17 +1,24 @@
 """Setup wizard API endpoints."""
+import asyncio
+import base64
+import binascii
 import os
+import platform
 import secrets
+import subprocess
+import sys
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Union
-from datetime import datetime
+from typing import Optional, Tuple, Union
+from datetime import datetime, timezone
 from urllib.parse import quote_plus
 from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile, File, status
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from cryptography.fernet import Fernet
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.setup import SetupStatus
 from app.schemas.setup import (
     EncryptionKeySetup,
@@ -31,21 +38,44 @@ from app.services.certificate_service import CertificateService
 from app.services import auth_service
 from app.services.auth_service import hash_password
 from app.dependencies.auth import get_current_user
+from app.dependencies.rate_limit import RateLimiter
+from app.utils.envfile import update_env
 from app.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/setup", tags=["Setup Wizard"])
-limiter = Limiter(key_func=get_remote_address)
+
+
+# Roots a SQLite database path must stay within: data_dir and the working
+# directory, resolved once at import
+_DB_PATH_ROOTS = (settings.data_dir.resolve(), Path.cwd().resolve())
+
+
+@lru_cache(maxsize=8)
+def _redirect_url(https: bool, host: str, port: int) -> str:
+    """Build the URL the frontend should reload at after setup or a restart.
+
+    Keyed on the values rather than read from settings, since setup changes
+    host, port and SSL in memory.
+    """
+    scheme = "https" if https else "http"
+    if host == "0.0.0.0":
+        host = "localhost"
+    default_port = 443 if https else 80
+    port_suffix = "" if port == default_port else f":{port}"
+    return f"{scheme}://{host}{port_suffix}"
 
 
 def _validate_db_path(db_path: str) -> Path:
-    """Validate a SQLite database path is safe (no path traversal)."""
+    """Validate a SQLite database path is safe (no path traversal).
+
+    The path is resolved, so a symlink under an allowed root cannot point
+    the database outside it.
+    """
     path = Path(db_path).resolve()
-    # Must be within data_dir or current working directory
-    allowed_roots = [settings.data_dir.resolve(), Path.cwd().resolve()]
-    for root in allowed_roots:
+    for root in _DB_PATH_ROOTS:
         try:
             path.relative_to(root)
             return path
@@ -58,14 +88,57 @@ def _validate_db_path(db_path: str) -> Path:
 # Initialize certificate service
 cert_service = CertificateService(cert_dir=settings.data_dir / "certificates")
 
+# Directory the server is relaunched from on restart
+_BACKEND_DIR = str(Path(__file__).parent.parent.parent)
+
 # Maximum upload size for certificate files (1 MB)
 _MAX_CERT_UPLOAD_BYTES = 1 * 1024 * 1024
 
 
-def _require_setup_incomplete(db: Session) -> None:
-    """Guard: reject requests if setup is already complete."""
-    setup = db.query(SetupStatus).first()
-    if setup and setup.is_complete:
+async def _read_cert_uploads(
+    certificate: UploadFile, private_key: UploadFile, chain: Optional[UploadFile]
+) -> Tuple[Optional[str], tuple]:
+    """Read the certificate, key and optional chain uploads.
+
+    Returns (name of the first file over the size limit or None, contents).
+    The declared sizes are checked first so an oversized upload is rejected
+    before anything is buffered; the capped reads cover clients that send
+    no size.
+    """
+    uploads = {"Certificate": certificate, "Private key": private_key, "Chain": chain}
+    for name, upload in uploads.items():
+        if upload is not None and upload.size and upload.size > _MAX_CERT_UPLOAD_BYTES:
+            return name, ()
+
+    # Each read hops to the threadpool; run them side by side. Only the
+    # trailing chain is optional, so missing files pad the end.
+    present = [upload for upload in uploads.values() if upload is not None]
+    read = await asyncio.gather(*(upload.read(_MAX_CERT_UPLOAD_BYTES + 1) for upload in present))
+    contents = tuple(read) + (None,) * (len(uploads) - len(present))
+    for name, data in zip(uploads, contents):
+        if data and len(data) > _MAX_CERT_UPLOAD_BYTES:
+            return name, ()
+    return None, contents
+
+
+async def _require_setup_incomplete(db: AsyncSession) -> SetupStatus:
+    """Guard: reject requests if setup is already complete.
+
+    Returns the setup status record so the step can update it without
+    looking it up again. Once setup is known to be complete, rejects
+    without a database lookup.
+    """
+    _reject_if_complete(None)
+    setup = await get_setup_status(db, commit=False)
+    _reject_if_complete(setup)
+    return setup
+
+
+def _reject_if_complete(setup: Optional[SetupStatus]) -> None:
+    """Raise 403 if setup is complete, per the process flag or the record."""
+    global _setup_complete
+    if _setup_complete or (setup is not None and setup.is_complete):
+        _setup_complete = True
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Setup is already complete. Use the settings API to make changes.",
@@ -81,24 +154,89 @@ def generate_encryption_key() -> str:
     return Fernet.generate_key().decode()
 
 
-def get_setup_status(db: Session) -> SetupStatus:
-    """Get or create setup status record."""
-    setup = db.query(SetupStatus).first()
-    if not setup:
+def _validate_fernet_key(key: str) -> None:
+    """Check a Fernet key's format without building a cipher from it.
+
+    Raises:
+        ValueError: if the key is not urlsafe base64 of 32 bytes.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(key.encode("ascii"))
+    except (UnicodeEncodeError, binascii.Error) as e:
+        raise ValueError("Fernet key must be urlsafe base64") from e
+    if len(raw) != 32:
+        raise ValueError("Fernet key must be 32 bytes")
+
+
+# ID of the single setup status record, remembered so later lookups are
+# primary-key gets
+_setup_status_id: Optional[int] = None
+
+# Set once setup is seen to be complete; it stays complete unless the
+# database is purged (see invalidate_setup_status)
+_setup_complete = False
+
+
+async def get_setup_status(db: AsyncSession, commit: bool = True) -> SetupStatus:
+    """Get or create setup status record.
+
+    With commit=False a newly created record is only flushed, for callers
+    that update it and commit once themselves.
+    """
+    global _setup_status_id
+    setup = await _find_setup_status(db)
+    if setup is None:
         setup = SetupStatus()
         db.add(setup)
-        db.commit()
-        db.refresh(setup)
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+        _setup_status_id = setup.id
+    return setup
+
+
+def invalidate_setup_status() -> None:
+    """Forget the cached setup status after its table is emptied."""
+    global _setup_status_id, _setup_complete
+    _setup_status_id = None
+    _setup_complete = False
+
+
+async def _find_setup_status(db: AsyncSession) -> Optional[SetupStatus]:
+    """Look up the setup status record without creating it."""
+    global _setup_status_id
+    setup = await db.get(SetupStatus, _setup_status_id) if _setup_status_id is not None else None
+    if setup is None:
+        setup = await db.scalar(select(SetupStatus).limit(1))
+        if setup is not None:
+            _setup_status_id = setup.id
     return setup
 
 
+# Reported by the status endpoint until a setup step creates the record
+_NO_SETUP_STATUS = SetupStatusResponse(
+    is_complete=False,
+    setup_version=SetupStatus.__table__.c.setup_version.default.arg,
+    encryption_key_set=False,
+    admin_credentials_set=False,
+    ssl_configured=False,
+    database_configured=False,
+    server_configured=False,
+    needs_setup=True,
+)
+
+
 @router.get("/status", response_model=SetupStatusResponse)
-def check_setup_status(db: Session = Depends(get_db)):
+async def check_setup_status(db: AsyncSession = Depends(get_async_db)):
     """Check if initial setup is needed.
 
-    Returns setup status including which steps are complete.
+    Returns setup status including which steps are complete. Read-only:
+    a missing record is reported as not started rather than created.
     """
-    setup = get_setup_status(db)
+    setup = await _find_setup_status(db)
+    if setup is None:
+        return _NO_SETUP_STATUS
 
     return SetupStatusResponse(
         is_complete=setup.is_complete,
@@ -116,7 +254,7 @@ def check_setup_status(db: Session = Depends(get_db)):
 
 
 @router.get("/encryption-key/generate")
-def generate_new_encryption_key():
+async def generate_new_encryption_key():
     """Generate a new cryptographically secure encryption key.
 
     This endpoint generates a fresh, unique Fernet encryption key.
@@ -137,54 +275,35 @@ def generate_new_encryption_key():
     }
 
 
-@router.post("/encryption-key", response_model=SetupStepResponse)
-@limiter.limit("5/minute")
-def setup_encryption_key(
-    request: Request,
+@router.post(
+    "/encryption-key",
+    response_model=SetupStepResponse,
+    dependencies=[Depends(RateLimiter(times=5, seconds=60))],
+)
+async def setup_encryption_key(
     key_data: EncryptionKeySetup,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set up encryption key.
 
     Validates and saves the encryption key to environment.
     If no key is provided, a new one will be auto-generated.
     """
-    _require_setup_incomplete(db)
+    setup = await _require_setup_incomplete(db)
     try:
-        # Auto-generate key if not provided
-        encryption_key = key_data.encryption_key or generate_encryption_key()
-
-        # Validate the key
-        Fernet(encryption_key.encode())
+        # Validate a provided key; auto-generate one otherwise
+        if key_data.encryption_key:
+            _validate_fernet_key(key_data.encryption_key)
+            encryption_key = key_data.encryption_key
+        else:
+            encryption_key = generate_encryption_key()
 
         # Update .env file
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-
-        # Read existing .env
-        env_content = ""
-        if env_path.exists():
-            with open(env_path, "r") as f:
-                env_content = f.read()
-
-        # Update or add encryption key
-        lines = env_content.split("\n")
-        key_updated = False
-        for i, line in enumerate(lines):
-            if line.startswith("PARSEDMARC_ENCRYPTION_KEY="):
-                lines[i] = f"PARSEDMARC_ENCRYPTION_KEY={encryption_key}"
-                key_updated = True
-                break
-
-        if not key_updated:
-            lines.append(f"PARSEDMARC_ENCRYPTION_KEY={encryption_key}")
-
-        # Write back to .env
-        _secure_write_env(env_path, "\n".join(lines))
+        await run_in_threadpool(update_env, {"PARSEDMARC_ENCRYPTION_KEY": encryption_key})
 
         # Update setup status
-        setup = get_setup_status(db)
         setup.encryption_key_set = True
-        db.commit()
+        await db.commit()
 
         was_auto_generated = not key_data.encryption_key
         logger.info(f"Encryption key configured successfully (auto-generated: {was_auto_generated})")
@@ -207,59 +326,41 @@ def setup_encryption_key(
         )
 
 
-@router.post("/admin-credentials", response_model=SetupStepResponse)
-@limiter.limit("5/minute")
-def setup_admin_credentials(
-    request: Request,
+@router.post(
+    "/admin-credentials",
+    response_model=SetupStepResponse,
+    dependencies=[Depends(RateLimiter(times=5, seconds=60))],
+)
+async def setup_admin_credentials(
     credentials: AdminCredentialsSetup,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set up admin credentials.
 
     Validates and saves admin username and password.
     """
-    _require_setup_incomplete(db)
+    setup = await _require_setup_incomplete(db)
     try:
-        # Update .env file
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-
-        # Read existing .env
-        env_content = ""
-        if env_path.exists():
-            with open(env_path, "r") as f:
-                env_content = f.read()
-
         # Hash the password with bcrypt before storing
-        password_hash = hash_password(credentials.password)
-
-        # Update credentials
-        lines = env_content.split("\n")
-        username_updated = False
-        password_updated = False
-
-        for i, line in enumerate(lines):
-            if line.startswith("PARSEDMARC_GUI_USERNAME="):
-                lines[i] = f"PARSEDMARC_GUI_USERNAME={credentials.username}"
-                username_updated = True
-            elif line.startswith("PARSEDMARC_GUI_PASSWORD_HASH="):
-                lines[i] = f"PARSEDMARC_GUI_PASSWORD_HASH={password_hash}"
-                password_updated = True
-
-        # Remove any legacy plaintext password line
-        lines = [l for l in lines if not l.startswith("PARSEDMARC_GUI_PASSWORD=")]
+        password_hash = await run_in_threadpool(
+            hash_password, credentials.password, rounds=settings.bcrypt_setup_rounds
+        )
 
-        if not username_updated:
-            lines.append(f"PARSEDMARC_GUI_USERNAME={credentials.username}")
-        if not password_updated:
-            lines.append(f"PARSEDMARC_GUI_PASSWORD_HASH={password_hash}")
+        # Update .env file, removing any legacy plaintext password
+        await run_in_threadpool(update_env, {
+            "PARSEDMARC_GUI_USERNAME": credentials.username,
+            "PARSEDMARC_GUI_PASSWORD_HASH": password_hash,
+            "PARSEDMARC_GUI_PASSWORD": None,
+        })
 
-        # Write back to .env
-        _secure_write_env(env_path, "\n".join(lines))
+        # Update in-memory settings so login uses the new hash without a restart
+        settings.gui_username = credentials.username
+        settings.gui_password_hash = password_hash
+        settings.gui_password_plain = None
 
         # Update setup status
-        setup = get_setup_status(db)
         setup.admin_credentials_set = True
-        db.commit()
+        await db.commit()
 
         logger.info("Admin credentials configured successfully")
 
@@ -276,127 +377,123 @@ def setup_admin_credentials(
         )
 
 
-@router.post("/ssl", response_model=SetupStepResponse)
-def setup_ssl(
-    ssl_config: Union[SSLSetupSelfSigned, SSLSetupLetsEncrypt, SSLSetupCustom],
-    db: Session = Depends(get_db)
-):
-    """Set up SSL/TLS certificate.
+async def _setup_self_signed(ssl_config: SSLSetupSelfSigned, setup: SetupStatus) -> dict:
+    """Generate a self-signed certificate and record it on setup."""
+    # Always creates a new unique certificate
+    logger.info(f"Generating unique self-signed certificate for {ssl_config.common_name}")
+    result = await run_in_threadpool(
+        cert_service.generate_self_signed_certificate,
+        common_name=ssl_config.common_name,
+        organization=ssl_config.organization,
+        validity_days=ssl_config.validity_days,
+        force_regenerate=True  # Always generate fresh certificate
+    )
 
-    Supports self-signed, Let's Encrypt, or custom certificates.
-    """
-    _require_setup_incomplete(db)
-    try:
-        result = None
-
-        if isinstance(ssl_config, SSLSetupSelfSigned):
-            # Generate self-signed certificate (always creates a new unique certificate)
-            logger.info(f"Generating unique self-signed certificate for {ssl_config.common_name}")
-            result = cert_service.generate_self_signed_certificate(
-                common_name=ssl_config.common_name,
-                organization=ssl_config.organization,
-                validity_days=ssl_config.validity_days,
-                force_regenerate=True  # Always generate fresh certificate
-            )
+    setup.ssl_configured = True
+    setup.ssl_type = "self-signed"
+    setup.ssl_domain = ssl_config.common_name
 
-            # Update setup status
-            setup = get_setup_status(db)
-            setup.ssl_configured = True
-            setup.ssl_type = "self-signed"
-            setup.ssl_domain = ssl_config.common_name
-
-            # Store certificate metadata in setup_metadata
-            if not setup.setup_metadata:
-                setup.setup_metadata = {}
-            setup.setup_metadata["ssl_certificate_serial"] = result.get("serial_number")
-            setup.setup_metadata["ssl_certificate_generated_at"] = datetime.utcnow().isoformat()
-
-            db.commit()
-
-            logger.info(f"Self-signed certificate configured with serial: {result.get('serial_number')}")
-
-        elif isinstance(ssl_config, SSLSetupLetsEncrypt):
-            # Dispatch between HTTP-01 and DNS-01 challenge
-            if ssl_config.challenge_type == "dns-01":
-                result = cert_service.request_letsencrypt_certificate_dns(
-                    domain=ssl_config.domain,
-                    email=ssl_config.email,
-                    provider=ssl_config.dns_provider,
-                    credentials=ssl_config.dns_credentials or {},
-                    staging=ssl_config.staging,
-                )
-            else:
-                webroot = Path(ssl_config.webroot_path) if ssl_config.webroot_path else None
-                result = cert_service.request_letsencrypt_certificate(
-                    domain=ssl_config.domain,
-                    email=ssl_config.email,
-                    webroot_path=webroot,
-                    staging=ssl_config.staging,
-                )
+    # Store certificate metadata in setup_metadata (a new dict, so
+    # the JSON column sees the change)
+    setup.setup_metadata = {
+        **(setup.setup_metadata or {}),
+        "ssl_certificate_serial": result.get("serial_number"),
+        "ssl_certificate_generated_at": datetime.now(timezone.utc).isoformat(),
+    }
 
-            if result.get("success"):
-                setup = get_setup_status(db)
-                setup.ssl_configured = True
-                setup.ssl_type = "letsencrypt"
-                setup.ssl_domain = ssl_config.domain
-                setup.ssl_email = ssl_config.email
-                setup.letsencrypt_staging = ssl_config.staging
-                db.commit()
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Let's Encrypt certificate request failed: {result.get('error')}"
-                )
+    logger.info(f"Self-signed certificate configured with serial: {result.get('serial_number')}")
+    return result
+
+
+async def _setup_letsencrypt(ssl_config: SSLSetupLetsEncrypt, setup: SetupStatus) -> dict:
+    """Request a Let's Encrypt certificate and record it on setup."""
+    # Dispatch between HTTP-01 and DNS-01 challenge
+    if ssl_config.challenge_type == "dns-01":
+        result = await run_in_threadpool(
+            cert_service.request_letsencrypt_certificate_dns,
+            domain=ssl_config.domain,
+            email=ssl_config.email,
+            provider=ssl_config.dns_provider,
+            credentials=ssl_config.dns_credentials or {},
+            staging=ssl_config.staging,
+        )
+    else:
+        webroot = Path(ssl_config.webroot_path) if ssl_config.webroot_path else None
+        result = await run_in_threadpool(
+            cert_service.request_letsencrypt_certificate,
+            domain=ssl_config.domain,
+            email=ssl_config.email,
+            webroot_path=webroot,
+            staging=ssl_config.staging,
+        )
 
-        elif isinstance(ssl_config, SSLSetupCustom):
-            # Validate custom certificate paths
-            cert_path = Path(ssl_config.certificate_path)
-            key_path = Path(ssl_config.private_key_path)
+    if not result.get("success"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Let's Encrypt certificate request failed: {result.get('error')}"
+        )
 
-            if not cert_path.exists():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Certificate file not found: {ssl_config.certificate_path}"
-                )
+    setup.ssl_configured = True
+    setup.ssl_type = "letsencrypt"
+    setup.ssl_domain = ssl_config.domain
+    setup.ssl_email = ssl_config.email
+    setup.letsencrypt_staging = ssl_config.staging
+    return result
 
-            if not key_path.exists():
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Private key file not found: {ssl_config.private_key_path}"
-                )
 
-            # Get certificate info
-            cert_info = cert_service.get_certificate_info(cert_path)
+async def _setup_custom(ssl_config: SSLSetupCustom, setup: SetupStatus) -> dict:
+    """Check custom certificate paths and record them on setup."""
+    cert_path = Path(ssl_config.certificate_path)
+    key_path = Path(ssl_config.private_key_path)
 
-            result = {
-                "certificate": str(cert_path),
-                "private_key": str(key_path),
-                "type": "custom",
-                "expires": cert_info.get("expires")
-            }
+    if not cert_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Certificate file not found: {ssl_config.certificate_path}"
+        )
+
+    if not key_path.exists():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Private key file not found: {ssl_config.private_key_path}"
+        )
+
+    cert_info = await run_in_threadpool(cert_service.get_certificate_info, cert_path)
+
+    setup.ssl_configured = True
+    setup.ssl_type = "custom"
+    return {
+        "certificate": str(cert_path),
+        "private_key": str(key_path),
+        "type": "custom",
+        "expires": cert_info.get("expires")
+    }
+
+
+# SSL setup handler for each request schema
+_SSL_SETUP_HANDLERS = {
+    SSLSetupSelfSigned: _setup_self_signed,
+    SSLSetupLetsEncrypt: _setup_letsencrypt,
+    SSLSetupCustom: _setup_custom,
+}
 
-            # Update setup status
-            setup = get_setup_status(db)
-            setup.ssl_configured = True
-            setup.ssl_type = "custom"
-            db.commit()
+
+@router.post("/ssl", response_model=SetupStepResponse)
+async def setup_ssl(
+    ssl_config: Union[SSLSetupSelfSigned, SSLSetupLetsEncrypt, SSLSetupCustom],
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Set up SSL/TLS certificate.
+
+    Supports self-signed, Let's Encrypt, or custom certificates.
+    """
+    setup = await _require_setup_incomplete(db)
+    try:
+        result = await _SSL_SETUP_HANDLERS[type(ssl_config)](ssl_config, setup)
+        await db.commit()
 
         # Enable SSL in .env so uvicorn uses HTTPS on next restart
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-        env_content = ""
-        if env_path.exists():
-            with open(env_path, "r") as f:
-                env_content = f.read()
-        lines = env_content.split("\n")
-        ssl_updated = False
-        for i, line in enumerate(lines):
-            if line.startswith("PARSEDMARC_SSL_ENABLED="):
-                lines[i] = "PARSEDMARC_SSL_ENABLED=true"
-                ssl_updated = True
-                break
-        if not ssl_updated:
-            lines.append("PARSEDMARC_SSL_ENABLED=true")
-        _secure_write_env(env_path, "\n".join(lines))
+        await run_in_threadpool(update_env, {"PARSEDMARC_SSL_ENABLED": "true"})
 
         logger.info(f"SSL configured successfully: {ssl_config.type}")
 
@@ -417,48 +514,24 @@ def setup_ssl(
 
 
 @router.post("/server", response_model=SetupStepResponse)
-def setup_server(
+async def setup_server(
     server_config: ServerSetup,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set up server configuration."""
-    _require_setup_incomplete(db)
+    setup = await _require_setup_incomplete(db)
     try:
-        # Update .env file
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-
-        # Read existing .env
-        env_content = ""
-        if env_path.exists():
-            with open(env_path, "r") as f:
-                env_content = f.read()
-
-        # Update server settings
-        lines = env_content.split("\n")
-        settings_to_update = {
+        # Update server settings in .env
+        await run_in_threadpool(update_env, {
             "PARSEDMARC_HOST": server_config.host,
             "PARSEDMARC_PORT": str(server_config.port),
             "PARSEDMARC_CORS_ORIGINS": server_config.cors_origins,
             "PARSEDMARC_LOG_LEVEL": server_config.log_level
-        }
-
-        for key, value in settings_to_update.items():
-            updated = False
-            for i, line in enumerate(lines):
-                if line.startswith(f"{key}="):
-                    lines[i] = f"{key}={value}"
-                    updated = True
-                    break
-            if not updated:
-                lines.append(f"{key}={value}")
-
-        # Write back to .env
-        _secure_write_env(env_path, "\n".join(lines))
+        })
 
         # Update setup status
-        setup = get_setup_status(db)
         setup.server_configured = True
-        db.commit()
+        await db.commit()
 
         logger.info("Server configuration saved successfully")
 
@@ -488,27 +561,21 @@ def _build_database_url(db_type: str, db_host: str, db_port: int,
 
 
 @router.post("/database", response_model=SetupStepResponse)
-def setup_database(
+async def setup_database(
     db_config: DatabaseSetup,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set up database configuration."""
-    _require_setup_incomplete(db)
+    setup = await _require_setup_incomplete(db)
     try:
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-        env_content = ""
-        if env_path.exists():
-            with open(env_path, "r") as f:
-                env_content = f.read()
-
-        lines = env_content.split("\n")
-
         if db_config.db_type == "sqlite":
             # Validate path before using
             validated_path = _validate_db_path(db_config.db_path)
             # SQLite: set DB_PATH, remove DATABASE_URL if present
-            _update_env_lines(lines, "PARSEDMARC_DB_PATH", str(validated_path))
-            _remove_env_line(lines, "PARSEDMARC_DATABASE_URL")
+            await run_in_threadpool(update_env, {
+                "PARSEDMARC_DB_PATH": str(validated_path),
+                "PARSEDMARC_DATABASE_URL": None,
+            })
 
             validated_path.parent.mkdir(parents=True, exist_ok=True)
         else:
@@ -519,13 +586,10 @@ def setup_database(
                 db_config.db_name or "", db_config.db_user or "",
                 db_config.db_password or "",
             )
-            _update_env_lines(lines, "PARSEDMARC_DATABASE_URL", database_url)
+            await run_in_threadpool(update_env, {"PARSEDMARC_DATABASE_URL": database_url})
 
-        _secure_write_env(env_path, "\n".join(lines))
-
-        setup = get_setup_status(db)
         setup.database_configured = True
-        db.commit()
+        await db.commit()
 
         logger.info(f"Database configuration saved successfully (type={db_config.db_type})")
 
@@ -542,42 +606,60 @@ def setup_database(
         )
 
 
-@router.post("/complete", response_model=SetupStepResponse)
-@limiter.limit("5/minute")
-def complete_setup(
-    request: Request,
+@router.post(
+    "/complete",
+    response_model=SetupStepResponse,
+    dependencies=[Depends(RateLimiter(times=5, seconds=60))],
+)
+async def complete_setup(
     response: Response,
     setup_data: CompleteSetup,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Complete the entire setup in one request.
 
     This endpoint performs all setup steps at once.
     """
+    global _setup_complete
+    # Looked up once for both the guard and the final update. Not created
+    # yet, so no write transaction stays open during certificate requests.
+    _reject_if_complete(None)
+    setup = await _find_setup_status(db)
+    _reject_if_complete(setup)
     try:
         # 1. Setup encryption key - auto-generate if not provided
-        encryption_key = setup_data.encryption_key or generate_encryption_key()
         was_key_auto_generated = not setup_data.encryption_key
-
-        try:
-            Fernet(encryption_key.encode())
-        except Exception:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid encryption key format"
-            )
+        if was_key_auto_generated:
+            encryption_key = generate_encryption_key()
+        else:
+            encryption_key = setup_data.encryption_key
+            try:
+                _validate_fernet_key(encryption_key)
+            except Exception:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Invalid encryption key format"
+                )
 
         logger.info(f"Complete setup using {'auto-generated' if was_key_auto_generated else 'provided'} encryption key")
 
-        # 2. Setup SSL if requested
+        # 2. Setup SSL if requested. Self-signed key generation and the
+        # bcrypt hash are both CPU-bound, so they run side by side.
         ssl_result = None
+        password_hash = None
         if setup_data.ssl_type == "self-signed":
             logger.info("Generating unique self-signed certificate for this installation")
-            ssl_result = cert_service.generate_self_signed_certificate(
-                common_name=setup_data.ssl_common_name or "localhost",
-                organization="ParseDMARC",
-                validity_days=365,
-                force_regenerate=True  # Always create fresh certificate per installation
+            password_hash, ssl_result = await asyncio.gather(
+                run_in_threadpool(
+                    hash_password, setup_data.admin_password, rounds=settings.bcrypt_setup_rounds
+                ),
+                run_in_threadpool(
+                    cert_service.generate_self_signed_certificate,
+                    common_name=setup_data.ssl_common_name or "localhost",
+                    organization="ParseDMARC",
+                    validity_days=365,
+                    force_regenerate=True  # Always create fresh certificate per installation
+                ),
             )
             logger.info(f"Self-signed certificate generated with serial: {ssl_result.get('serial_number')}")
         elif setup_data.ssl_type == "letsencrypt":
@@ -587,7 +669,8 @@ def complete_setup(
                     detail="Domain and email required for Let's Encrypt"
                 )
             if setup_data.ssl_challenge_type == "dns-01":
-                ssl_result = cert_service.request_letsencrypt_certificate_dns(
+                ssl_result = await run_in_threadpool(
+                    cert_service.request_letsencrypt_certificate_dns,
                     domain=setup_data.ssl_domain,
                     email=setup_data.ssl_email,
                     provider=setup_data.ssl_dns_provider,
@@ -595,7 +678,8 @@ def complete_setup(
                     staging=setup_data.ssl_staging,
                 )
             else:
-                ssl_result = cert_service.request_letsencrypt_certificate(
+                ssl_result = await run_in_threadpool(
+                    cert_service.request_letsencrypt_certificate,
                     domain=setup_data.ssl_domain,
                     email=setup_data.ssl_email,
                     staging=setup_data.ssl_staging,
@@ -607,19 +691,14 @@ def complete_setup(
                 )
 
         # 3. Update .env file with all settings
-        env_path = Path(__file__).parent.parent.parent.parent / ".env"
-        env_content = ""
-        if env_path.exists():
-            with open(env_path, "r") as f:
-                env_content = f.read()
-
-        lines = env_content.split("\n") if env_content else []
-
-        # Hash admin password with bcrypt
-        password_hash = hash_password(setup_data.admin_password)
+        # Hash admin password with bcrypt, unless done alongside the certificate
+        if password_hash is None:
+            password_hash = await run_in_threadpool(
+                hash_password, setup_data.admin_password, rounds=settings.bcrypt_setup_rounds
+            )
 
-        # Generate JWT secret key
-        jwt_secret_key = secrets.token_urlsafe(64)
+        # Generate JWT secret key; 256 bits matches the HS256 digest size
+        jwt_secret_key = secrets.token_urlsafe(32)
 
         # Settings to update (use generated encryption_key, not from setup_data)
         env_updates = {
@@ -637,7 +716,9 @@ def complete_setup(
         # Database configuration
         db_type = getattr(setup_data, "db_type", "sqlite") or "sqlite"
         if db_type == "sqlite":
-            env_updates["PARSEDMARC_DB_PATH"] = setup_data.db_path
+            # Validated before anything is written to .env
+            validated_db_path = _validate_db_path(setup_data.db_path)
+            env_updates["PARSEDMARC_DB_PATH"] = str(validated_db_path)
         else:
             database_url = _build_database_url(
                 db_type,
@@ -649,24 +730,20 @@ def complete_setup(
             )
             env_updates["PARSEDMARC_DATABASE_URL"] = database_url
 
-        for key, value in env_updates.items():
-            _update_env_lines(lines, key, value)
-
         # Remove legacy plaintext password (replaced by hash above)
-        _remove_env_line(lines, "PARSEDMARC_GUI_PASSWORD")
+        env_updates["PARSEDMARC_GUI_PASSWORD"] = None
 
         # Remove conflicting DB keys
         if db_type == "sqlite":
-            _remove_env_line(lines, "PARSEDMARC_DATABASE_URL")
+            env_updates["PARSEDMARC_DATABASE_URL"] = None
         else:
-            _remove_env_line(lines, "PARSEDMARC_DB_PATH")
+            env_updates["PARSEDMARC_DB_PATH"] = None
 
-        # Write back to .env
-        _secure_write_env(env_path, "\n".join(lines))
+        # Write back to .env in a single pass
+        await run_in_threadpool(update_env, env_updates)
 
         # 4. Ensure database directory exists (SQLite only)
         if db_type == "sqlite":
-            validated_db_path = _validate_db_path(setup_data.db_path)
             validated_db_path.parent.mkdir(parents=True, exist_ok=True)
 
         # 5. Update in-memory settings so login works without a server restart
@@ -679,8 +756,9 @@ def complete_setup(
         settings.host = setup_data.host
         settings.port = setup_data.port
 
-        # 6. Update setup status
-        setup = get_setup_status(db)
+        # 6. Update setup status, committed together with the changes below
+        if setup is None:
+            setup = await get_setup_status(db, commit=False)
         setup.is_complete = True
         setup.encryption_key_set = True
         setup.admin_credentials_set = True
@@ -691,16 +769,20 @@ def complete_setup(
         setup.ssl_domain = setup_data.ssl_domain
         setup.ssl_email = setup_data.ssl_email
         setup.letsencrypt_staging = setup_data.ssl_staging
-        setup.completed_at = datetime.utcnow()
+        # Stored naive, like every other DateTime column
+        now = datetime.now(timezone.utc)
+        setup.completed_at = now.replace(tzinfo=None)
 
         # Store certificate metadata if self-signed
         if setup_data.ssl_type == "self-signed" and ssl_result:
-            if not setup.setup_metadata:
-                setup.setup_metadata = {}
-            setup.setup_metadata["ssl_certificate_serial"] = ssl_result.get("serial_number")
-            setup.setup_metadata["ssl_certificate_generated_at"] = datetime.utcnow().isoformat()
+            setup.setup_metadata = {
+                **(setup.setup_metadata or {}),
+                "ssl_certificate_serial": ssl_result.get("serial_number"),
+                "ssl_certificate_generated_at": now.isoformat(),
+            }
 
-        db.commit()
+        await db.commit()
+        _setup_complete = True
 
         logger.info("Setup completed successfully")
 
@@ -728,12 +810,7 @@ def complete_setup(
             max_age=settings.access_token_expire_minutes * 60,
         )
 
-        # Build the redirect URL for the frontend
-        scheme = "https" if setup_data.ssl_type != "skip" else "http"
-        host_for_url = setup_data.host if setup_data.host != "0.0.0.0" else "localhost"
-        default_port = 443 if scheme == "https" else 80
-        port_suffix = "" if setup_data.port == default_port else f":{setup_data.port}"
-        redirect_url = f"{scheme}://{host_for_url}{port_suffix}"
+        redirect_url = _redirect_url(setup_data.ssl_type != "skip", setup_data.host, setup_data.port)
 
         response_data = {
             "ssl_configured": setup.ssl_configured,
@@ -751,9 +828,11 @@ def complete_setup(
 
         return SetupStepResponse(
             success=True,
-            message="Setup completed successfully! " +
-                   ("SAVE THE ENCRYPTION KEY DISPLAYED BELOW! " if was_key_auto_generated else "") +
-                   ("Restart the server to enable HTTPS." if setup_data.ssl_type != "skip" else ""),
+            message="".join((
+                "Setup completed successfully! ",
+                "SAVE THE ENCRYPTION KEY DISPLAYED BELOW! " if was_key_auto_generated else "",
+                "Restart the server to enable HTTPS." if setup_data.ssl_type != "skip" else "",
+            )),
             data=response_data
         )
 
@@ -768,9 +847,9 @@ def complete_setup(
 
 
 @router.get("/certificate", response_model=CertificateInfo)
-def get_certificate_info(_user: str = Depends(get_current_user)):
+async def get_certificate_info(_user: str = Depends(get_current_user)):
     """Get information about the current SSL certificate."""
-    cert_info = cert_service.get_active_certificate()
+    cert_info = await run_in_threadpool(cert_service.get_active_certificate)
 
     if cert_info:
         return CertificateInfo(**cert_info)
@@ -782,10 +861,10 @@ def get_certificate_info(_user: str = Depends(get_current_user)):
 
 
 @router.post("/certificate/renew", response_model=SetupStepResponse)
-def renew_certificate(db: Session = Depends(get_db), _user: str = Depends(get_current_user)):
+async def renew_certificate(db: AsyncSession = Depends(get_async_db), _user: str = Depends(get_current_user)):
     """Renew Let's Encrypt certificate."""
     try:
-        setup = get_setup_status(db)
+        setup = await get_setup_status(db)
 
         if setup.ssl_type != "letsencrypt":
             raise HTTPException(
@@ -793,7 +872,7 @@ def renew_certificate(db: Session = Depends(get_db), _user: str = Depends(get_cu
                 detail="Certificate renewal is only available for Let's Encrypt certificates"
             )
 
-        result = cert_service.renew_letsencrypt_certificate(setup.ssl_domain)
+        result = await run_in_threadpool(cert_service.renew_letsencrypt_certificate, setup.ssl_domain)
 
         if result.get("success"):
             return SetupStepResponse(
@@ -824,7 +903,7 @@ def renew_certificate(db: Session = Depends(get_db), _user: str = Depends(get_cu
 @router.post("/restart", response_model=SetupStepResponse)
 async def restart_server(
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Restart the server to apply new configuration (e.g. HTTPS).
@@ -833,14 +912,6 @@ async def restart_server(
     The server re-launches via ``python -m app.main`` which reads the
     updated .env and applies SSL if configured.
     """
-    import asyncio
-    import subprocess
-    import sys
-    import os as _os
-    import platform
-
-    backend_dir = str(Path(__file__).parent.parent.parent)
-
     async def _do_restart():
         await asyncio.sleep(1.5)
         if platform.system() == "Windows":
@@ -848,59 +919,23 @@ async def restart_server(
             # server processes.  Spawn a detached child and exit instead.
             subprocess.Popen(
                 [sys.executable, "-m", "app.main"],
-                cwd=backend_dir,
+                cwd=_BACKEND_DIR,
                 creationflags=subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS,
             )
-            _os._exit(0)
+            os._exit(0)
         else:
-            _os.chdir(backend_dir)
-            _os.execv(sys.executable, [sys.executable, "-m", "app.main"])
+            os.chdir(_BACKEND_DIR)
+            os.execv(sys.executable, [sys.executable, "-m", "app.main"])
 
     asyncio.get_running_loop().create_task(_do_restart())
 
-    scheme = "https" if settings.ssl_enabled else "http"
-    host = settings.host if settings.host != "0.0.0.0" else "localhost"
-    default_port = 443 if scheme == "https" else 80
-    port_suffix = "" if settings.port == default_port else f":{settings.port}"
-
     return SetupStepResponse(
         success=True,
         message="Server is restarting...",
-        data={"redirect_url": f"{scheme}://{host}{port_suffix}"},
+        data={"redirect_url": _redirect_url(settings.ssl_enabled, settings.host, settings.port)},
     )
 
 
-# ------------------------------------------------------------------ #
-#  .env helpers
-# ------------------------------------------------------------------ #
-
-def _secure_write_env(env_path: Path, content: str) -> None:
-    """Write content to .env file with restrictive permissions."""
-    with open(env_path, "w") as f:
-        f.write(content)
-    try:
-        os.chmod(env_path, 0o600)
-    except OSError:
-        pass  # chmod not supported on Windows
-
-
-def _update_env_lines(lines: list, key: str, value: str) -> None:
-    """Update or append a key=value pair in an env lines list (in-place)."""
-    for i, line in enumerate(lines):
-        if line.startswith(f"{key}="):
-            lines[i] = f"{key}={value}"
-            return
-    lines.append(f"{key}={value}")
-
-
-def _remove_env_line(lines: list, key: str) -> None:
-    """Remove a key from an env lines list (in-place)."""
-    for i, line in enumerate(lines):
-        if line.startswith(f"{key}="):
-            lines.pop(i)
-            return
-
-
 # ------------------------------------------------------------------ #
 #  Certificate Upload & Validation
 # ------------------------------------------------------------------ #
@@ -908,29 +943,11 @@ def _remove_env_line(lines: list, key: str) -> None:
 def _update_env_ssl(cert_path: str, key_path: str) -> None:
     """Write PARSEDMARC_SSL_CERTFILE, PARSEDMARC_SSL_KEYFILE, and
     PARSEDMARC_SSL_ENABLED into .env."""
-    env_path = Path(__file__).parent.parent.parent.parent / ".env"
-    env_content = ""
-    if env_path.exists():
-        with open(env_path, "r") as f:
-            env_content = f.read()
-
-    lines = env_content.split("\n")
-    updates = {
+    update_env({
         "PARSEDMARC_SSL_ENABLED": "true",
         "PARSEDMARC_SSL_CERTFILE": cert_path,
         "PARSEDMARC_SSL_KEYFILE": key_path,
-    }
-    for key, value in updates.items():
-        found = False
-        for i, line in enumerate(lines):
-            if line.startswith(f"{key}="):
-                lines[i] = f"{key}={value}"
-                found = True
-                break
-        if not found:
-            lines.append(f"{key}={value}")
-
-    _secure_write_env(env_path, "\n".join(lines))
+    })
 
 
 @router.post("/ssl/upload", response_model=SetupStepResponse)
@@ -938,7 +955,7 @@ async def upload_ssl_certificate(
     certificate: UploadFile = File(..., description="PEM certificate file"),
     private_key: UploadFile = File(..., description="PEM private key file"),
     chain: Optional[UploadFile] = File(None, description="PEM chain file (optional)"),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """Upload and apply a custom SSL certificate.
@@ -946,29 +963,27 @@ async def upload_ssl_certificate(
     Validates the certificate/key pair before saving.
     """
     try:
-        cert_data = await certificate.read(_MAX_CERT_UPLOAD_BYTES + 1)
-        key_data = await private_key.read(_MAX_CERT_UPLOAD_BYTES + 1)
-        chain_data = await chain.read(_MAX_CERT_UPLOAD_BYTES + 1) if chain else None
-
-        for name, data in [("Certificate", cert_data), ("Private key", key_data), ("Chain", chain_data)]:
-            if data and len(data) > _MAX_CERT_UPLOAD_BYTES:
-                raise HTTPException(
-                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                    detail=f"{name} file exceeds maximum size of 1 MB",
-                )
+        oversized, contents = await _read_cert_uploads(certificate, private_key, chain)
+        if oversized is not None:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"{oversized} file exceeds maximum size of 1 MB",
+            )
+        cert_data, key_data, chain_data = contents
 
-        result = cert_service.save_uploaded_certificate(
+        result = await run_in_threadpool(
+            cert_service.save_uploaded_certificate,
             cert_data, key_data, chain_data
         )
 
         # Update setup status
-        setup = get_setup_status(db)
+        setup = await get_setup_status(db, commit=False)
         setup.ssl_configured = True
         setup.ssl_type = "custom"
-        db.commit()
+        await db.commit()
 
         # Update .env to point to the saved files
-        _update_env_ssl(result["certificate"], result["private_key"])
+        await run_in_threadpool(_update_env_ssl, result["certificate"], result["private_key"])
 
         return SetupStepResponse(
             success=True,
@@ -979,6 +994,8 @@ async def upload_ssl_certificate(
             data=result,
         )
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -1004,15 +1021,13 @@ async def validate_ssl_certificate(
     Use this to check files before uploading.
     """
     try:
-        cert_data = await certificate.read(_MAX_CERT_UPLOAD_BYTES + 1)
-        key_data = await private_key.read(_MAX_CERT_UPLOAD_BYTES + 1)
-        chain_data = await chain.read(_MAX_CERT_UPLOAD_BYTES + 1) if chain else None
-
-        for name, data in [("Certificate", cert_data), ("Private key", key_data), ("Chain", chain_data)]:
-            if data and len(data) > _MAX_CERT_UPLOAD_BYTES:
-                return CertificateValidationResult(valid=False, error=f"{name} file exceeds maximum size of 1 MB")
+        oversized, contents = await _read_cert_uploads(certificate, private_key, chain)
+        if oversized is not None:
+            return CertificateValidationResult(valid=False, error=f"{oversized} file exceeds maximum size of 1 MB")
+        cert_data, key_data, chain_data = contents
 
-        result = cert_service.validate_certificate_pair(
+        result = await run_in_threadpool(
+            cert_service.validate_certificate_pair,
             cert_data, key_data, chain_data
         )
         return CertificateValidationResult(**result)
@@ -1,20 +1,22 @@
 """Testing API endpoints for verifying connections to output destinations."""
+import asyncio
 import ipaddress
 import logging
 import socket
+from http.cookiejar import CookieJar, DefaultCookiePolicy
 from typing import Optional
 from urllib.parse import urlparse
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
+import httpx
+from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.dependencies.auth import get_current_user
+from app.dependencies.rate_limit import RateLimiter
 from app.models.output_config import OutputConfig
-from app.services.encryption_service import EncryptionService
+from app.services.encryption_service import encryption_service
 
 logger = logging.getLogger(__name__)
 
@@ -31,30 +33,71 @@ _BLOCKED_NETWORKS = [
     ipaddress.ip_network("fe80::/10"),
 ]
 
+# (network, netmask) integer pairs per IP version, so the check is a mask
+# and compare instead of ip_network.__contains__
+_BLOCKED_MASKS = {
+    version: tuple(
+        (int(n.network_address), int(n.netmask))
+        for n in _BLOCKED_NETWORKS
+        if n.version == version
+    )
+    for version in (4, 6)
+}
 
-def _validate_target_host(host: str) -> None:
+
+async def _validate_target_host(host: str) -> None:
     """Validate that a target host does not resolve to a private/blocked IP."""
     try:
-        addr_infos = socket.getaddrinfo(host, None)
-        for family, _, _, _, sockaddr in addr_infos:
-            ip = ipaddress.ip_address(sockaddr[0])
-            for network in _BLOCKED_NETWORKS:
-                if ip in network:
-                    raise ValueError(f"Connection to private/internal addresses is not allowed")
+        addr_infos = await asyncio.get_running_loop().getaddrinfo(host, None)
     except socket.gaierror:
-        pass  # DNS resolution failed — let the actual connection handle it
+        return  # DNS resolution failed — let the actual connection handle it
+    for _, _, _, _, sockaddr in addr_infos:
+        ip = ipaddress.ip_address(sockaddr[0])
+        ip_int = int(ip)
+        if any((ip_int & mask) == net for net, mask in _BLOCKED_MASKS[ip.version]):
+            raise ValueError("Connection to private/internal addresses is not allowed")
 
 
-def _validate_url(url: str) -> None:
+async def _validate_url(url: str) -> None:
     """Validate a URL is not targeting internal resources."""
     parsed = urlparse(url)
     if not parsed.scheme or parsed.scheme not in ("http", "https"):
         raise ValueError("Only http and https URLs are allowed")
     if not parsed.hostname:
         raise ValueError("URL must include a hostname")
-    _validate_target_host(parsed.hostname)
+    await _validate_target_host(parsed.hostname)
+
+
+# ---------- HTTP clients ----------
+
+# Shared across probes so repeat tests reuse pooled connections and TLS
+# contexts. Cookies are never stored, so one test cannot leak a session
+# into the next.
+
+
+def _make_http_client(verify: bool) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        verify=verify,
+        timeout=10.0,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+    )
+
+
+_HTTP_CLIENT = _make_http_client(verify=True)
+_HTTP_CLIENT_NOVERIFY = _make_http_client(verify=False)
+
+
+async def close_http_clients() -> None:
+    """Close the shared probe clients (called on application shutdown)."""
+    await _HTTP_CLIENT.aclose()
+    await _HTTP_CLIENT_NOVERIFY.aclose()
+
+
+def _http_client(verify: bool) -> httpx.AsyncClient:
+    """Return the shared client for the given certificate verification mode."""
+    return _HTTP_CLIENT if verify else _HTTP_CLIENT_NOVERIFY
 
-encryption_service = EncryptionService()
 
 # ---------- Schemas ----------
 
@@ -69,15 +112,16 @@ class ConnectionTestResponse(BaseModel):
 # ---------- Router ----------
 
 router = APIRouter(prefix="/api/test", tags=["Connection Testing"])
-limiter = Limiter(key_func=get_remote_address)
 
 
-@router.post("/output/{config_id}", response_model=ConnectionTestResponse)
-@limiter.limit("10/minute")
-def test_output_connection(
-    request: Request,
+@router.post(
+    "/output/{config_id}",
+    response_model=ConnectionTestResponse,
+    dependencies=[Depends(RateLimiter(times=10, seconds=60))],
+)
+async def test_output_connection(
     config_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _user: str = Depends(get_current_user),
 ):
     """
@@ -85,7 +129,7 @@ def test_output_connection(
 
     Performs a basic connection check for the configured output type.
     """
-    config = db.query(OutputConfig).filter(OutputConfig.id == config_id).first()
+    config = await db.get(OutputConfig, config_id)
     if not config:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -95,7 +139,7 @@ def test_output_connection(
     settings = encryption_service.decrypt_dict(config.settings)
 
     try:
-        result = _test_output(config.type, settings)
+        result = await _test_output(config.type, settings)
         return result
     except Exception as e:
         logger.error(f"Output connection test failed for config {config_id}: {e}")
@@ -105,35 +149,26 @@ def test_output_connection(
         )
 
 
-def _test_output(output_type: str, settings: dict) -> ConnectionTestResponse:
-    """Test connection to an output destination based on type."""
+async def _tcp_connect(host: str, port: int, timeout: float = 5.0) -> None:
+    """Open and close a TCP connection without blocking the event loop."""
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout=timeout)
+    writer.close()
+    await writer.wait_closed()
 
-    if output_type == "elasticsearch":
-        return _test_elasticsearch(settings)
-    elif output_type == "opensearch":
-        return _test_opensearch(settings)
-    elif output_type == "splunk":
-        return _test_splunk(settings)
-    elif output_type == "kafka":
-        return _test_kafka(settings)
-    elif output_type == "s3":
-        return _test_s3(settings)
-    elif output_type == "syslog":
-        return _test_syslog(settings)
-    elif output_type == "gelf":
-        return _test_gelf(settings)
-    elif output_type == "webhook":
-        return _test_webhook(settings)
-    else:
+
+async def _test_output(output_type: str, settings: dict) -> ConnectionTestResponse:
+    """Test connection to an output destination based on type."""
+    tester = _OUTPUT_TESTERS.get(output_type)
+    if tester is None:
         return ConnectionTestResponse(
             success=False,
             message=f"Unknown output type: {output_type}",
         )
+    return await tester(settings)
 
 
-def _test_elasticsearch(settings: dict) -> ConnectionTestResponse:
+async def _test_elasticsearch(settings: dict) -> ConnectionTestResponse:
     """Test Elasticsearch connection."""
-    import httpx
 
     hosts = settings.get("hosts", [])
     if not hosts:
@@ -141,11 +176,11 @@ def _test_elasticsearch(settings: dict) -> ConnectionTestResponse:
 
     url = hosts[0].rstrip("/")
     try:
-        _validate_url(url)
+        await _validate_url(url)
     except ValueError as e:
         return ConnectionTestResponse(success=False, message=str(e))
 
-    kwargs: dict = {"timeout": 10.0, "verify": settings.get("ssl", True)}
+    client = _http_client(bool(settings.get("ssl", True)))
 
     auth = None
     if settings.get("username") and settings.get("password"):
@@ -156,7 +191,7 @@ def _test_elasticsearch(settings: dict) -> ConnectionTestResponse:
         headers["Authorization"] = f"ApiKey {settings['api_key']}"
 
     try:
-        resp = httpx.get(url, auth=auth, headers=headers, **kwargs)
+        resp = await client.get(url, auth=auth, headers=headers)
         resp.raise_for_status()
         info = resp.json()
         return ConnectionTestResponse(
@@ -170,14 +205,13 @@ def _test_elasticsearch(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message=f"HTTP error: status {e.response.status_code}")
 
 
-def _test_opensearch(settings: dict) -> ConnectionTestResponse:
+async def _test_opensearch(settings: dict) -> ConnectionTestResponse:
     """Test OpenSearch connection (same protocol as Elasticsearch)."""
-    return _test_elasticsearch(settings)
+    return await _test_elasticsearch(settings)
 
 
-def _test_splunk(settings: dict) -> ConnectionTestResponse:
+async def _test_splunk(settings: dict) -> ConnectionTestResponse:
     """Test Splunk HEC connection."""
-    import httpx
 
     url = settings.get("url", "")
     token = settings.get("token", "")
@@ -185,7 +219,7 @@ def _test_splunk(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message="URL and token are required")
 
     try:
-        _validate_url(url)
+        await _validate_url(url)
     except ValueError as e:
         return ConnectionTestResponse(success=False, message=str(e))
 
@@ -195,7 +229,7 @@ def _test_splunk(settings: dict) -> ConnectionTestResponse:
     try:
         # HEC health check
         health_url = url.replace("/services/collector", "/services/collector/health/1.0")
-        resp = httpx.get(health_url, headers=headers, verify=verify, timeout=10.0)
+        resp = await _http_client(verify).get(health_url, headers=headers)
         if resp.status_code == 200:
             return ConnectionTestResponse(success=True, message="Splunk HEC is healthy")
         return ConnectionTestResponse(
@@ -206,7 +240,7 @@ def _test_splunk(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message=f"Cannot connect to {url}")
 
 
-def _test_kafka(settings: dict) -> ConnectionTestResponse:
+async def _test_kafka(settings: dict) -> ConnectionTestResponse:
     """Test Kafka connection (basic socket check)."""
 
     servers = settings.get("servers", [])
@@ -219,24 +253,22 @@ def _test_kafka(settings: dict) -> ConnectionTestResponse:
     port = int(parts[1]) if len(parts) > 1 else 9092
 
     try:
-        _validate_target_host(host)
+        await _validate_target_host(host)
     except ValueError as e:
         return ConnectionTestResponse(success=False, message=str(e))
 
     try:
-        sock = socket.create_connection((host, port), timeout=5)
-        sock.close()
+        await _tcp_connect(host, port)
         return ConnectionTestResponse(
             success=True,
             message=f"TCP connection to {host}:{port} successful",
         )
-    except (socket.timeout, ConnectionRefusedError, OSError) as e:
+    except (asyncio.TimeoutError, OSError) as e:
         return ConnectionTestResponse(success=False, message=f"Cannot connect to {host}:{port}: {e}")
 
 
-def _test_s3(settings: dict) -> ConnectionTestResponse:
+async def _test_s3(settings: dict) -> ConnectionTestResponse:
     """Test S3 bucket access (HEAD bucket)."""
-    import httpx
 
     bucket = settings.get("bucket", "")
     region = settings.get("region", "us-east-1")
@@ -246,7 +278,7 @@ def _test_s3(settings: dict) -> ConnectionTestResponse:
     # Basic check: try to reach the bucket endpoint
     url = f"https://{bucket}.s3.{region}.amazonaws.com/"
     try:
-        resp = httpx.head(url, timeout=10.0)
+        resp = await _HTTP_CLIENT.head(url)
         if resp.status_code in (200, 301, 403):
             return ConnectionTestResponse(
                 success=True,
@@ -261,7 +293,7 @@ def _test_s3(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message=f"Cannot reach S3 endpoint for bucket '{bucket}'")
 
 
-def _test_syslog(settings: dict) -> ConnectionTestResponse:
+async def _test_syslog(settings: dict) -> ConnectionTestResponse:
     """Test Syslog server reachability (UDP or TCP socket)."""
 
     server = settings.get("server", "")
@@ -270,15 +302,14 @@ def _test_syslog(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message="Server is required")
 
     try:
-        _validate_target_host(server)
+        await _validate_target_host(server)
     except ValueError as e:
         return ConnectionTestResponse(success=False, message=str(e))
 
     try:
-        sock = socket.create_connection((server, port), timeout=5)
-        sock.close()
+        await _tcp_connect(server, port)
         return ConnectionTestResponse(success=True, message=f"Syslog server {server}:{port} is reachable")
-    except (socket.timeout, ConnectionRefusedError, OSError):
+    except (asyncio.TimeoutError, OSError):
         # Syslog often uses UDP, so TCP failure doesn't mean it's down
         return ConnectionTestResponse(
             success=True,
@@ -287,7 +318,7 @@ def _test_syslog(settings: dict) -> ConnectionTestResponse:
         )
 
 
-def _test_gelf(settings: dict) -> ConnectionTestResponse:
+async def _test_gelf(settings: dict) -> ConnectionTestResponse:
     """Test GELF server reachability."""
 
     server = settings.get("server", "")
@@ -296,21 +327,19 @@ def _test_gelf(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message="Server is required")
 
     try:
-        _validate_target_host(server)
+        await _validate_target_host(server)
     except ValueError as e:
         return ConnectionTestResponse(success=False, message=str(e))
 
     try:
-        sock = socket.create_connection((server, port), timeout=5)
-        sock.close()
+        await _tcp_connect(server, port)
         return ConnectionTestResponse(success=True, message=f"GELF server {server}:{port} is reachable")
-    except (socket.timeout, ConnectionRefusedError, OSError) as e:
+    except (asyncio.TimeoutError, OSError) as e:
         return ConnectionTestResponse(success=False, message=f"Cannot connect to {server}:{port}: {e}")
 
 
-def _test_webhook(settings: dict) -> ConnectionTestResponse:
+async def _test_webhook(settings: dict) -> ConnectionTestResponse:
     """Test webhook URL accessibility."""
-    import httpx
 
     url = settings.get("url", "")
     timeout = settings.get("timeout", 30)
@@ -318,7 +347,7 @@ def _test_webhook(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message="URL is required")
 
     try:
-        _validate_url(url)
+        await _validate_url(url)
     except ValueError as e:
         return ConnectionTestResponse(success=False, message=str(e))
 
@@ -326,7 +355,7 @@ def _test_webhook(settings: dict) -> ConnectionTestResponse:
 
     try:
         # Send a HEAD request to verify the endpoint exists
-        resp = httpx.head(url, headers=headers, timeout=float(timeout))
+        resp = await _HTTP_CLIENT.head(url, headers=headers, timeout=float(timeout))
         return ConnectionTestResponse(
             success=True,
             message=f"Webhook endpoint responded with HTTP {resp.status_code}",
@@ -336,3 +365,15 @@ def _test_webhook(settings: dict) -> ConnectionTestResponse:
         return ConnectionTestResponse(success=False, message=f"Cannot connect to {url}")
     except httpx.HTTPError as e:
         return ConnectionTestResponse(success=False, message=f"HTTP error: {str(e)[:200]}")
+
+
+_OUTPUT_TESTERS = {
+    "elasticsearch": _test_elasticsearch,
+    "opensearch": _test_opensearch,
+    "splunk": _test_splunk,
+    "kafka": _test_kafka,
+    "s3": _test_s3,
+    "syslog": _test_syslog,
+    "gelf": _test_gelf,
+    "webhook": _test_webhook,
+}
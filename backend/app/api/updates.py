@@ -1,6 +1,7 @@
 """Update checker API endpoints."""
 import logging
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -25,6 +26,9 @@ class UpdateStatusResponse(BaseModel):
     is_docker: bool
     error: Optional[str] = None
 
+    class Config:
+        from_attributes = True
+
 
 class UpdateSettingsResponse(BaseModel):
     """Response for update check settings."""
@@ -49,6 +53,26 @@ def _get_update_service():
     return update_service
 
 
+# Last UpdateInfo and the response built from it. The service replaces the
+# result object on every check, so identity tells whether it changed.
+_last_status: Optional[tuple] = None
+
+
+def _status_response(result) -> UpdateStatusResponse:
+    """Build the status response, reusing it while the result is unchanged."""
+    global _last_status
+    if _last_status is not None and _last_status[0] is result:
+        return _last_status[1]
+    response = UpdateStatusResponse.model_validate(result)
+    _last_status = (result, response)
+    return response
+
+
+@lru_cache(maxsize=4)
+def _settings_response(enabled: bool, interval_hours: int, is_docker: bool) -> UpdateSettingsResponse:
+    return UpdateSettingsResponse(enabled=enabled, interval_hours=interval_hours, is_docker=is_docker)
+
+
 @router.get("/status", response_model=UpdateStatusResponse)
 async def get_update_status(_user: str = Depends(get_current_user)):
     """Get current update status (returns cached result or checks now)."""
@@ -56,17 +80,7 @@ async def get_update_status(_user: str = Depends(get_current_user)):
     result = svc.get_cached_result()
     if result is None:
         result = await svc.check_now()
-    return UpdateStatusResponse(
-        update_available=result.update_available,
-        current_version=result.current_version,
-        latest_version=result.latest_version,
-        release_url=result.release_url,
-        release_notes=result.release_notes,
-        published_at=result.published_at,
-        checked_at=result.checked_at,
-        is_docker=result.is_docker,
-        error=result.error,
-    )
+    return _status_response(result)
 
 
 @router.post("/check", response_model=UpdateStatusResponse)
@@ -74,17 +88,7 @@ async def check_for_updates(_user: str = Depends(get_current_user)):
     """Force an immediate update check (bypasses cache)."""
     svc = _get_update_service()
     result = await svc.check_now()
-    return UpdateStatusResponse(
-        update_available=result.update_available,
-        current_version=result.current_version,
-        latest_version=result.latest_version,
-        release_url=result.release_url,
-        release_notes=result.release_notes,
-        published_at=result.published_at,
-        checked_at=result.checked_at,
-        is_docker=result.is_docker,
-        error=result.error,
-    )
+    return _status_response(result)
 
 
 @router.get("/settings", response_model=UpdateSettingsResponse)
@@ -92,8 +96,8 @@ async def get_update_settings(_user: str = Depends(get_current_user)):
     """Get update checker settings."""
     from app.config import settings
     svc = _get_update_service()
-    return UpdateSettingsResponse(
-        enabled=settings.update_check_enabled,
-        interval_hours=settings.update_check_interval_hours,
-        is_docker=svc._is_docker,
+    return _settings_response(
+        settings.update_check_enabled,
+        settings.update_check_interval_hours,
+        svc._is_docker,
     )
@@ -1,11 +1,21 @@
 """Application configuration."""
 import secrets
+from functools import cached_property
 from pathlib import Path
 from typing import List, Optional, Union
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+# Cached Settings properties keyed by the field they are derived from;
+# assigning the field at runtime drops the cached value
+_DERIVED_FROM = {
+    "database_url": ("effective_database_url", "database_type"),
+    "db_path": ("effective_database_url", "database_type"),
+    "cors_origins_raw": ("cors_origins",),
+}
+
+
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
 
@@ -28,6 +38,15 @@ class Settings(BaseSettings):
     gui_password_hash: Optional[str] = Field(default=None, validation_alias="PARSEDMARC_GUI_PASSWORD_HASH")
     gui_password_plain: Optional[str] = Field(default=None, validation_alias="PARSEDMARC_GUI_PASSWORD")
 
+    # bcrypt cost factor: calibrated at startup against bcrypt_target_ms
+    # unless set explicitly
+    bcrypt_rounds: Optional[int] = Field(default=None, ge=4, le=31, validation_alias="PARSEDMARC_BCRYPT_ROUNDS")
+    # Target bcrypt hash time used to calibrate the cost factor
+    bcrypt_target_ms: int = Field(default=250, ge=50, le=5000, validation_alias="PARSEDMARC_BCRYPT_TARGET_MS")
+    # Cheaper bcrypt cost for the hash made during setup (calibrated cost if
+    # unset); the hash is upgraded to the calibrated cost on first login
+    bcrypt_setup_rounds: Optional[int] = Field(default=None, ge=4, le=14, validation_alias="PARSEDMARC_BCRYPT_SETUP_ROUNDS")
+
     # JWT signing key — auto-generated if not provided
     secret_key: str = Field(
         default_factory=lambda: secrets.token_urlsafe(64),
@@ -44,8 +63,13 @@ class Settings(BaseSettings):
         validation_alias="PARSEDMARC_CORS_ORIGINS"
     )
 
+    # Redis URL for shared rate limit counters (in-memory if unset)
+    redis_url: Optional[str] = Field(default=None, validation_alias="PARSEDMARC_REDIS_URL")
+
     # Logging
     log_level: str = Field(default="INFO", validation_alias="PARSEDMARC_LOG_LEVEL")
+    # Log database queries slower than this many milliseconds (0 disables)
+    slow_query_ms: int = Field(default=100, ge=0, validation_alias="PARSEDMARC_SLOW_QUERY_MS")
 
     # Token expiration (in minutes)
     access_token_expire_minutes: int = Field(default=60 * 24, validation_alias="PARSEDMARC_TOKEN_EXPIRE")
@@ -63,7 +87,7 @@ class Settings(BaseSettings):
     ssl_certfile: Optional[str] = Field(default=None, validation_alias="PARSEDMARC_SSL_CERTFILE")
     ssl_keyfile: Optional[str] = Field(default=None, validation_alias="PARSEDMARC_SSL_KEYFILE")
 
-    @property
+    @cached_property
     def effective_database_url(self) -> str:
         """Get the effective database URL.
 
@@ -74,7 +98,7 @@ class Settings(BaseSettings):
             return self.database_url
         return f"sqlite:///{self.db_path}"
 
-    @property
+    @cached_property
     def database_type(self) -> str:
         """Get the current database backend type."""
         url = self.effective_database_url
@@ -84,13 +108,18 @@ class Settings(BaseSettings):
             return "mysql"
         return "sqlite"
 
-    @property
+    @cached_property
     def cors_origins(self) -> List[str]:
         """Get CORS origins as a list."""
         if isinstance(self.cors_origins_raw, str):
             return [origin.strip() for origin in self.cors_origins_raw.split(",")]
         return self.cors_origins_raw
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        for cached in _DERIVED_FROM.get(name, ()):
+            self.__dict__.pop(cached, None)
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # Ensure data directory exists
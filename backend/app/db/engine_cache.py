@@ -0,0 +1,67 @@
+"""Shared engines for databases other than the app's own session engine.
+
+The database settings endpoints and migration service connect to
+arbitrary target URLs. Engines are kept per URL so repeated calls (test,
+then migrate, then counts) reuse pooled connections instead of paying
+for a new connection and dialect setup each time.
+"""
+import threading
+from collections import OrderedDict
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine, make_url
+
+from app.db.session import DATABASE_URL, engine as app_engine
+
+# Upper bound on cached target engines; each holds its own pool
+MAX_CACHED_ENGINES = 8
+
+_engines: "OrderedDict[str, Engine]" = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_engine(database_url: str) -> Engine:
+    """Return a pooled engine for database_url, creating it on first use.
+
+    The app's own database URL maps to the app engine. When the cache is
+    full, the least recently used engine is disposed.
+    """
+    if database_url == DATABASE_URL:
+        return app_engine
+
+    with _engines_lock:
+        engine = _engines.get(database_url)
+        if engine is not None:
+            _engines.move_to_end(database_url)
+            return engine
+
+        kwargs = {"pool_pre_ping": True}
+        if make_url(database_url).get_backend_name() != "sqlite":
+            kwargs.update(pool_size=5, max_overflow=10, pool_recycle=1800)
+        engine = create_engine(database_url, **kwargs)
+        _engines[database_url] = engine
+
+        if len(_engines) > MAX_CACHED_ENGINES:
+            _, oldest = _engines.popitem(last=False)
+            oldest.dispose()
+    return engine
+
+
+def discard_engine(database_url: str) -> None:
+    """Drop and dispose the cached engine for database_url, if any.
+
+    Used when a URL turns out to be unreachable, so a dead engine does not
+    occupy a cache slot or push out a working one.
+    """
+    with _engines_lock:
+        engine = _engines.pop(database_url, None)
+    if engine is not None:
+        engine.dispose()
+
+
+def dispose_engines() -> None:
+    """Dispose every cached engine (called on application shutdown)."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
@@ -1,15 +1,28 @@
 """Database session management."""
-from sqlalchemy import create_engine
+import logging
+import time
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Build engine kwargs based on database type
 _engine_kwargs = {
     "echo": settings.log_level == "DEBUG",
 }
 
 if settings.database_type == "sqlite":
+    # Keep a few connections open so their page cache survives between requests
     _engine_kwargs["connect_args"] = {"check_same_thread": False}
+    _engine_kwargs["poolclass"] = QueuePool
+    _engine_kwargs["pool_size"] = 5
 else:
     # PostgreSQL / MySQL: enable connection health checks
     _engine_kwargs["pool_pre_ping"] = True
@@ -18,13 +31,85 @@ else:
 DATABASE_URL = settings.effective_database_url
 engine = create_engine(DATABASE_URL, **_engine_kwargs)
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _log_slow_queries(target: Engine) -> None:
+    """Log statements on target that take longer than PARSEDMARC_SLOW_QUERY_MS."""
+    if not settings.slow_query_ms:
+        return
+    threshold = settings.slow_query_ms / 1000
+
+    # The start time lives on the statement's execution context, so a
+    # statement that raises (and never reaches after_cursor_execute) leaves
+    # nothing behind to skew the next one's timing.
+    @event.listens_for(target, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    @event.listens_for(target, "after_cursor_execute")
+    def _check_timer(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if elapsed > threshold:
+            logger.warning(f"Slow query ({elapsed * 1000:.0f} ms): {statement}")
+
+
+def _tune_sqlite(target: Engine) -> None:
+    """Put each new SQLite connection on target into WAL mode.
+
+    Pooled connections then keep their page cache between requests, and
+    the setup wizard's many small commits don't each wait on a full fsync.
+    """
+    if settings.database_type != "sqlite":
+        return
+
+    @event.listens_for(target, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+
+_log_slow_queries(engine)
+_tune_sqlite(engine)
+
+# Create session factory. Objects keep their loaded state after commit, so
+# returning them from an endpoint doesn't trigger a reload SELECT.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async driver (and the package providing it) for each backend; sync URLs
+# are rewritten to use these
+_ASYNC_DRIVERS = {
+    "sqlite": ("sqlite+aiosqlite", "aiosqlite"),
+    "postgresql": ("postgresql+asyncpg", "asyncpg"),
+    "mysql": ("mysql+aiomysql", "aiomysql"),
+}
+
+_async_engine: Optional[AsyncEngine] = None
+_async_session_factory: Optional[async_sessionmaker] = None
 
 # Create base class for models
 Base = declarative_base()
 
 
+def ensure_indexes() -> None:
+    """Create model indexes missing from existing tables.
+
+    ``create_all`` only creates indexes along with new tables, so indexes
+    added to a model later would never reach an existing database. Failures
+    (e.g. duplicate rows blocking a unique index) are logged, not raised.
+    """
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                logger.warning(f"Could not create index {index.name}: {e}")
+
+
 def get_db():
     """
     Dependency to get database session.
@@ -39,3 +124,60 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def _get_async_session_factory() -> async_sessionmaker:
+    """Create the async engine and session factory on first use."""
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        url = make_url(DATABASE_URL)
+        backend = url.get_backend_name()
+        drivername, package = _ASYNC_DRIVERS[backend]
+
+        kwargs = {"echo": _engine_kwargs["echo"]}
+        if settings.database_type != "sqlite":
+            kwargs.update(pool_pre_ping=True, pool_size=10, max_overflow=20, pool_recycle=1800)
+
+        try:
+            _async_engine = create_async_engine(url.set(drivername=drivername), **kwargs)
+        except ImportError as e:
+            raise RuntimeError(
+                f"The async {backend} driver is not installed; install '{package}' "
+                "(it is listed in backend/requirements.txt)"
+            ) from e
+        _log_slow_queries(_async_engine.sync_engine)
+        _tune_sqlite(_async_engine.sync_engine)
+        # Objects stay usable after commit: async sessions can't lazily
+        # reload expired attributes on access.
+        _async_session_factory = async_sessionmaker(
+            _async_engine, autoflush=False, expire_on_commit=False
+        )
+    return _async_session_factory
+
+
+def init_async_db() -> None:
+    """Create the async engine at startup.
+
+    Setup, status and most reads go through the async session, so a missing
+    async driver should stop the application with a clear message rather
+    than fail each of those requests.
+    """
+    _get_async_session_factory()
+
+
+def create_async_session() -> AsyncSession:
+    """Open a standalone async session; use as ``async with create_async_session() as db``."""
+    return _get_async_session_factory()()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """
+    Dependency to get an async database session.
+
+    Usage in FastAPI endpoints:
+        @app.get("/items")
+        async def read_items(db: AsyncSession = Depends(get_async_db)):
+            ...
+    """
+    async with create_async_session() as db:
+        yield db
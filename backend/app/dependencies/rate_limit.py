@@ -0,0 +1,211 @@
+"""Token-bucket rate limiting middleware and route dependency.
+
+RateLimitMiddleware checks path rules, declared when it is added to the
+app, on the raw ASGI scope before routing. RateLimiter is the per-route
+dependency form of the same check. Buckets live in Redis when
+PARSEDMARC_REDIS_URL is set, so limits are shared across Uvicorn workers.
+Without Redis they fall back to process memory, which is fine for
+single-worker and development deployments.
+"""
+import logging
+import math
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Pattern, Tuple
+
+from fastapi import HTTPException, Request, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Atomically refill the bucket, try to take a token, and store the result.
+# Returns the wait in seconds as a string (Lua numbers are truncated to
+# integers when returned to Redis); "0" means the request is allowed.
+_TOKEN_BUCKET_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local rate = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+return tostring(wait)
+"""
+
+
+class InMemoryBackend:
+    """Token buckets kept in process memory."""
+
+    # How often idle buckets are swept out, in seconds
+    SWEEP_INTERVAL = 60.0
+
+    def __init__(self):
+        # key -> (tokens, last hit, time the bucket is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._next_sweep = time.monotonic() + self.SWEEP_INTERVAL
+        self._lock = threading.Lock()
+
+    async def hit(self, key: str, limit: int, period: int) -> float:
+        """Take a token for key. Returns 0 if allowed, else seconds to wait."""
+        rate = limit / period
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            tokens, last, _ = self._buckets.get(key, (limit, now, now))
+            tokens = min(limit, tokens + (now - last) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, now + (limit - tokens) / rate)
+            return wait
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets that have refilled; they behave like a missing key.
+
+        Like the PEXPIRE on the Redis keys, this keeps memory bounded by the
+        clients seen in the last period rather than every client ever seen.
+        """
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if bucket[2] > now
+        }
+        self._next_sweep = now + self.SWEEP_INTERVAL
+
+
+class RedisBackend:
+    """Token buckets stored in Redis hashes (one Lua call per hit).
+
+    If Redis is unreachable, buckets fall back to process memory until it
+    answers again, so an outage degrades limits to per-worker instead of
+    failing the request.
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        from redis.exceptions import RedisError
+
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(_TOKEN_BUCKET_LUA)
+        self._errors = (RedisError, OSError)
+        self._fallback = InMemoryBackend()
+        self._failing = False
+
+    async def hit(self, key: str, limit: int, period: int) -> float:
+        """Take a token for key. Returns 0 if allowed, else seconds to wait."""
+        try:
+            wait = await self._script(keys=[key], args=[time.time(), limit, limit / period])
+        except self._errors as e:
+            if not self._failing:
+                logger.warning("Redis rate limit backend unavailable, using in-memory buckets: %s", e)
+                self._failing = True
+            return await self._fallback.hit(key, limit, period)
+        if self._failing:
+            logger.info("Redis rate limit backend recovered")
+            self._failing = False
+        return float(wait)
+
+
+_backend: Optional[object] = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the shared rate limit backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                if settings.redis_url:
+                    _backend = RedisBackend(settings.redis_url)
+                    logger.info("Rate limiting uses Redis backend")
+                else:
+                    _backend = InMemoryBackend()
+                    logger.info("Rate limiting uses in-memory backend")
+    return _backend
+
+
+def _exceeded_detail(limit: int, period: int) -> str:
+    return f"Rate limit exceeded: {limit} per {period} seconds"
+
+
+class RateLimiter:
+    """FastAPI dependency allowing ``times`` requests per ``seconds`` per client IP.
+
+    Uses the same backend and token buckets as RateLimitMiddleware, for
+    limits declared next to the route instead of in main.py.
+
+    Usage:
+        @router.post("/upload", dependencies=[Depends(RateLimiter(times=10, seconds=60))])
+    """
+
+    def __init__(self, times: int, seconds: int = 60):
+        self.times = times
+        self.seconds = seconds
+
+    async def __call__(self, request: Request) -> None:
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", request.url.path)
+        client_ip = request.client.host if request.client else "unknown"
+        key = f"ratelimit:{route_path}:{client_ip}"
+
+        retry_after = await get_backend().hit(key, self.times, self.seconds)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=_exceeded_detail(self.times, self.seconds),
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+class RateLimitMiddleware:
+    """ASGI middleware allowing ``limit`` requests per ``period`` seconds per client IP.
+
+    ``rules`` maps a path regex (matched against the whole request path) to a
+    ``(limit, period)`` tuple. The first matching rule applies; the bucket is
+    shared by every path the rule matches.
+
+    Usage:
+        app.add_middleware(RateLimitMiddleware, rules={"/api/auth/login": (5, 60)})
+    """
+
+    def __init__(self, app: ASGIApp, rules: Dict[str, Tuple[int, int]]):
+        self.app = app
+        self.rules: List[Tuple[Pattern[str], str, int, int]] = [
+            (re.compile(pattern), pattern, limit, period)
+            for pattern, (limit, period) in rules.items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            path = scope["path"]
+            for regex, pattern, limit, period in self.rules:
+                if not regex.fullmatch(path):
+                    continue
+                client = scope.get("client")
+                key = f"ratelimit:{pattern}:{client[0] if client else 'unknown'}"
+                retry_after = await get_backend().hit(key, limit, period)
+                if retry_after:
+                    response = JSONResponse(
+                        status_code=429,
+                        content={"detail": _exceeded_detail(limit, period)},
+                        headers={"Retry-After": str(math.ceil(retry_after))},
+                    )
+                    await response(scope, receive, send)
+                    return
+                break
+        await self.app(scope, receive, send)
@@ -2,17 +2,19 @@
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
 from pathlib import Path
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 
 from app.config import settings
-from app.db.session import engine, Base
+from app.db.session import engine, Base, ensure_indexes, init_async_db
+from app.db.engine_cache import dispose_engines
+from app.dependencies.rate_limit import RateLimitMiddleware
+from app.services import auth_service
 from app.services.monitoring_service import MonitoringService
 from app.services.update_service import UpdateService
 
@@ -49,6 +51,16 @@ async def lifespan(app: FastAPI):
     # Create database tables
     logger.info("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    ensure_indexes()
+    init_async_db()
+
+    # Pick the bcrypt cost now, off the event loop, so no login pays for it
+    logger.info("Calibrating bcrypt cost factor...")
+    await run_in_threadpool(auth_service.calibrate_bcrypt_rounds)
+
+    # Create the upload directory once rather than on every upload
+    from app.api.parsing import UPLOADS_DIR
+    UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
     # Initialize monitoring service
     logger.info("Initializing monitoring service...")
@@ -71,23 +83,37 @@ async def lifespan(app: FastAPI):
         await monitoring_service.stop()
     if update_service:
         await update_service.stop()
+    dispose_engines()
+    try:
+        from app.api.testing import close_http_clients
+        await close_http_clients()
+    except Exception as e:
+        logger.error("Failed to close testing HTTP clients: %s", e)
     logger.info("Shutdown complete.")
 
 
-# Rate limiter — uses client IP; default limits can be overridden per-route
-limiter = Limiter(key_func=get_remote_address, default_limits=["120/minute"])
-
 # Create FastAPI app
 app = FastAPI(
     title="ParseDMARC Web GUI",
     description="Web interface for ParseDMARC - DMARC report parser and analyzer",
     version=APP_VERSION,
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
-# Wire rate limiter into the app
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Compress larger responses; report lists with full report JSON can reach
+# megabytes. Small bodies aren't worth the CPU.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Added before CORS so CORS wraps it and its 429s carry CORS headers;
+# preflight requests are answered by CORS and never take a token.
+app.add_middleware(
+    RateLimitMiddleware,
+    rules={
+        "/api/auth/login": (5, 60),
+        "/api/configs/mailboxes/[^/]+/test": (10, 60),
+    },
+)
 
 # Configure CORS
 app.add_middleware(
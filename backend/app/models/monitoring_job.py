@@ -10,7 +10,10 @@ class MonitoringJob(Base):
     __tablename__ = "monitoring_jobs"
 
     id = Column(Integer, primary_key=True, index=True)
-    mailbox_config_id = Column(Integer, ForeignKey("mailbox_configs.id", ondelete="CASCADE"), nullable=False)
+    # One job per mailbox; every lookup goes through this column
+    mailbox_config_id = Column(
+        Integer, ForeignKey("mailbox_configs.id", ondelete="CASCADE"), nullable=False, unique=True, index=True
+    )
     status = Column(String(50), default="stopped", nullable=False)  # 'running', 'stopped', 'error'
     watch_mode = Column(Boolean, default=False)  # TRUE = continuous watch, FALSE = scheduled fetch
 
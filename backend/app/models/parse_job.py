@@ -1,6 +1,6 @@
 """Parse job model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
 from app.db.session import Base
 
 
@@ -8,6 +8,11 @@ class ParseJob(Base):
     """Model for tracking parsing jobs (file upload or mailbox fetch)."""
 
     __tablename__ = "parse_jobs"
+    __table_args__ = (
+        # Newest-first job list, with and without a status filter
+        Index("ix_parse_jobs_status_created_at", "status", "created_at"),
+        Index("ix_parse_jobs_created_at", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     job_type = Column(String(50), nullable=False)  # 'file_upload', 'mailbox_fetch'
@@ -1,6 +1,6 @@
 """Parsed report model."""
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from app.db.session import Base
 
 
@@ -8,6 +8,12 @@ class ParsedReport(Base):
     """Model for storing parsed report metadata (for dashboard display)."""
 
     __tablename__ = "parsed_reports"
+    __table_args__ = (
+        # Newest-first listing and keyset pagination on (created_at, id)
+        Index("ix_parsed_reports_created_at_id", "created_at", "id"),
+        # Same ordering when the list is filtered by report type
+        Index("ix_parsed_reports_report_type_created_at", "report_type", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     parse_job_id = Column(Integer, ForeignKey("parse_jobs.id", ondelete="CASCADE"), nullable=True)
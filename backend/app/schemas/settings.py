@@ -49,6 +49,7 @@ class DatabaseTestRequest(BaseModel):
 class DatabaseMigrateRequest(DatabaseTestRequest):
     """Request schema for migrating to a new database."""
     migrate_data: bool = Field(default=True, description="Whether to copy existing data")
+    batch_size: int = Field(default=5000, ge=100, le=50000, description="Rows copied per batch")
 
 
 class DatabaseInfoResponse(BaseModel):
@@ -56,6 +57,7 @@ class DatabaseInfoResponse(BaseModel):
     db_type: str
     connection_string: str
     table_counts: Dict[str, int]
+    counts_estimated: bool = False
 
 
 class DatabaseTestResponse(BaseModel):
@@ -65,13 +67,15 @@ class DatabaseTestResponse(BaseModel):
     details: Optional[Dict[str, str]] = None
 
 
-class DatabaseMigrateResponse(BaseModel):
-    """Response schema for database migration."""
-    success: bool
+class DatabaseMigrationStatus(BaseModel):
+    """Progress of a background database migration."""
+    job_id: str
+    status: str  # 'running', 'completed', 'failed'
     message: str
+    current_table: Optional[str] = None
     tables_migrated: int = 0
-    row_counts: Optional[Dict[str, int]] = None
-    restart_required: bool = True
+    row_counts: Dict[str, int] = Field(default_factory=dict)
+    restart_required: bool = False
 
 
 class DatabasePurgeResponse(BaseModel):
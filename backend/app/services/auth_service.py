@@ -1,18 +1,95 @@
 """Authentication service — password hashing, JWT tokens, CSRF tokens."""
+import base64
+import hashlib
+import hmac
+import logging
 import secrets
-from datetime import datetime, timedelta, timezone
+import statistics
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
 
 import bcrypt
 import jwt
+import orjson
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 JWT_ALGORITHM = "HS256"
 
 
-def hash_password(password: str) -> str:
-    """Hash a plaintext password with bcrypt."""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+def _b64url(data: bytes) -> bytes:
+    """Base64url-encode without padding, as required by RFC 7515."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+# The JOSE header never changes, so encode it once
+_JWT_HEADER_B64 = _b64url(orjson.dumps({"alg": JWT_ALGORITHM, "typ": "JWT"}))
+
+# bcrypt cost factor bounds used by calibration. The floor is bcrypt's
+# default cost, so calibration never weakens hashes on a slow host.
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 14
+
+# Hashes timed per cost factor; the median is compared with the target
+BCRYPT_CALIBRATION_SAMPLES = 3
+
+_calibration_lock = threading.Lock()
+
+
+def _time_hash_ms(rounds: int) -> float:
+    """Median time in milliseconds of a bcrypt hash at the given cost."""
+    samples = []
+    for _ in range(BCRYPT_CALIBRATION_SAMPLES):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(rounds=rounds))
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def calibrate_bcrypt_rounds() -> int:
+    """Pick the largest bcrypt cost whose hash time stays under the target.
+
+    Called once from the application lifespan. Each extra round doubles the
+    work, so the search stops at the first cost whose median hash time
+    exceeds settings.bcrypt_target_ms. The result is stored in
+    settings.bcrypt_rounds; a value set there explicitly is used as is.
+    """
+    if settings.bcrypt_rounds is not None:
+        return settings.bcrypt_rounds
+
+    with _calibration_lock:
+        if settings.bcrypt_rounds is not None:
+            return settings.bcrypt_rounds
+
+        chosen = BCRYPT_MIN_ROUNDS
+        for rounds in range(BCRYPT_MIN_ROUNDS, BCRYPT_MAX_ROUNDS + 1):
+            if _time_hash_ms(rounds) > settings.bcrypt_target_ms:
+                break
+            chosen = rounds
+
+        settings.bcrypt_rounds = chosen
+        logger.info(
+            "Calibrated bcrypt cost factor: %d (target %d ms)",
+            chosen, settings.bcrypt_target_ms,
+        )
+        return chosen
+
+
+def hash_password(password: str, rounds: int | None = None) -> str:
+    """Hash a plaintext password with bcrypt.
+
+    Args:
+        password: The plaintext password.
+        rounds: bcrypt cost factor. Defaults to the calibrated cost.
+    """
+    if rounds is None:
+        rounds = calibrate_bcrypt_rounds()
+    salt = bcrypt.gensalt(rounds=rounds)
+    return bcrypt.hashpw(password.encode("utf-8"), salt).decode("utf-8")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -22,9 +99,32 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash was made with less than the calibrated cost."""
+    try:
+        rounds = int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return False
+    return rounds < calibrate_bcrypt_rounds()
+
+
+@lru_cache(maxsize=1)
+def _jwt_hmac(secret_key: str) -> hmac.HMAC:
+    """Keyed HMAC-SHA256 state for the current secret, copied per token.
+
+    Keyed on the secret so a key rotated at runtime (e.g. by the setup
+    wizard) is picked up automatically.
+    """
+    return hmac.new(secret_key.encode("utf-8"), digestmod=hashlib.sha256)
+
+
 def create_access_token(subject: str, expires_delta: timedelta | None = None) -> str:
     """Create a signed JWT access token.
 
+    Produces a standard HS256 JWT (readable by PyJWT) without going through
+    jwt.encode: the header is pre-encoded, claims are serialized with orjson
+    and the keyed HMAC state is reused.
+
     Args:
         subject: The token subject (username).
         expires_delta: Custom expiration. Defaults to settings.access_token_expire_minutes.
@@ -32,13 +132,17 @@ def create_access_token(subject: str, expires_delta: timedelta | None = None) ->
     if expires_delta is None:
         expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
 
-    now = datetime.now(timezone.utc)
+    now = int(time.time())
     payload = {
         "sub": subject,
         "iat": now,
-        "exp": now + expires_delta,
+        "exp": now + int(expires_delta.total_seconds()),
     }
-    return jwt.encode(payload, settings.secret_key, algorithm=JWT_ALGORITHM)
+    signing_input = _JWT_HEADER_B64 + b"." + _b64url(orjson.dumps(payload))
+
+    mac = _jwt_hmac(settings.secret_key).copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode("ascii")
 
 
 def decode_access_token(token: str) -> dict:
@@ -51,5 +155,5 @@ def decode_access_token(token: str) -> dict:
 
 
 def generate_csrf_token() -> str:
-    """Generate a cryptographically random CSRF token."""
-    return secrets.token_urlsafe(32)
+    """Generate a cryptographically random CSRF token (128 bits)."""
+    return secrets.token_urlsafe(16)
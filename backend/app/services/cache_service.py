@@ -0,0 +1,118 @@
+"""Response cache for slow-changing detail endpoints.
+
+Entries are serialized JSON bodies. They are stored in Redis when
+PARSEDMARC_REDIS_URL is set, so all workers share them and invalidation
+reaches every worker; otherwise a bounded per-process TTL cache is used.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the in-memory cache; report bodies can be large
+MAX_MEMORY_ENTRIES = 256
+
+
+class InMemoryCache:
+    """TTL cache kept in process memory, evicting the oldest entry when full."""
+
+    def __init__(self, max_entries: int = MAX_MEMORY_ENTRIES):
+        self._entries: Dict[str, Tuple[float, bytes]] = {}
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store value for key for ttl seconds."""
+        with self._lock:
+            self._entries.pop(key, None)
+            if len(self._entries) >= self._max_entries:
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + ttl, value)
+
+    async def delete(self, key: str) -> None:
+        """Remove key from the cache if present."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisCache:
+    """TTL cache stored in Redis. Errors are logged and treated as misses."""
+
+    KEY_PREFIX = "cache:"
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+        from redis.exceptions import RedisError
+
+        self._client = redis.Redis.from_url(url)
+        self._errors = RedisError
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for key, or None if missing or expired."""
+        try:
+            return await self._client.get(self.KEY_PREFIX + key)
+        except self._errors as e:
+            logger.warning("Response cache read failed: %s", e)
+            return None
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        """Store value for key for ttl seconds."""
+        try:
+            await self._client.set(self.KEY_PREFIX + key, value, ex=ttl)
+        except self._errors as e:
+            logger.warning("Response cache write failed: %s", e)
+
+    async def delete(self, key: str) -> None:
+        """Remove key from the cache if present."""
+        try:
+            await self._client.delete(self.KEY_PREFIX + key)
+        except self._errors as e:
+            logger.warning("Response cache invalidation failed: %s", e)
+
+    async def clear(self) -> None:
+        """Remove every cached response (only keys under KEY_PREFIX)."""
+        try:
+            keys = [key async for key in self._client.scan_iter(match=self.KEY_PREFIX + "*", count=500)]
+            if keys:
+                await self._client.unlink(*keys)
+        except self._errors as e:
+            logger.warning("Response cache clear failed: %s", e)
+
+
+_cache: Optional[object] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the shared response cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                if settings.redis_url:
+                    _cache = RedisCache(settings.redis_url)
+                    logger.info("Response cache uses Redis backend")
+                else:
+                    _cache = InMemoryCache()
+                    logger.info("Response cache uses in-memory backend")
+    return _cache
@@ -9,6 +9,7 @@ import ipaddress
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any
 from cryptography import x509
 from cryptography.x509.oid import NameOID
@@ -40,6 +41,13 @@ def _validate_email(email: str) -> str:
     return email
 
 
+@lru_cache(maxsize=4)
+def _load_certificate(cert_path: str, mtime_ns: int) -> x509.Certificate:
+    """Parse a PEM certificate; mtime_ns is part of the key so rewrites miss the cache."""
+    with open(cert_path, "rb") as f:
+        return x509.load_pem_x509_certificate(f.read(), default_backend())
+
+
 class CertificateService:
     """Service for managing SSL/TLS certificates."""
 
@@ -673,12 +681,13 @@ class CertificateService:
     # ------------------------------------------------------------------ #
 
     def get_certificate_info(self, cert_path: Path) -> Dict[str, Any]:
-        """Get information about a certificate file."""
-        try:
-            with open(cert_path, "rb") as f:
-                cert_data = f.read()
+        """Get information about a certificate file.
 
-            cert = x509.load_pem_x509_certificate(cert_data, default_backend())
+        The parsed certificate is cached until the file's mtime changes, so
+        polling this doesn't re-read and re-parse the PEM each time.
+        """
+        try:
+            cert = _load_certificate(str(cert_path), cert_path.stat().st_mtime_ns)
 
             return {
                 "subject": cert.subject.rfc4514_string(),
@@ -1,10 +1,13 @@
 """Database migration service for switching between SQLite, PostgreSQL, and MySQL."""
 import logging
-from typing import Dict, Any, List
+import threading
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine, make_url
 
+from app.db.engine_cache import discard_engine, get_engine
 from app.db.session import Base
 
 logger = logging.getLogger(__name__)
@@ -20,12 +23,27 @@ TABLE_ORDER: List[str] = [
     "activity_logs",
 ]
 
-BATCH_SIZE = 1000
+# How long get_table_counts results are reused
+TABLE_COUNTS_CACHE_TTL_SECONDS = 30
+
+# How long a database's table list is reused; the schema only changes
+# through create_all/drop_all, which invalidate it
+TABLE_NAMES_CACHE_TTL_SECONDS = 300
+
+# Rows read from the source and inserted into the target per round trip
+BATCH_SIZE = 5000
 
 
 class DatabaseMigrationService:
     """Handles testing connections and migrating data between databases."""
 
+    def __init__(self):
+        # database_url -> (expires_at, counts)
+        self._counts_cache: Dict[str, Tuple[float, Dict[str, int]]] = {}
+        self._counts_lock = threading.Lock()
+        # database_url -> (expires_at, table names)
+        self._table_names_cache: Dict[str, Tuple[float, frozenset]] = {}
+
     def test_connection(self, database_url: str) -> Dict[str, Any]:
         """Test connectivity to a database.
 
@@ -33,60 +51,146 @@ class DatabaseMigrationService:
             dict with success, message, and optional details.
         """
         try:
-            engine = create_engine(database_url, pool_pre_ping=True)
-            with engine.connect() as conn:
+            with get_engine(database_url).connect() as conn:
                 conn.execute(text("SELECT 1"))
-            engine.dispose()
             return {
                 "success": True,
                 "message": "Connection successful.",
             }
         except Exception as e:
+            discard_engine(database_url)
             return {
                 "success": False,
                 "message": f"Connection failed: {e}",
                 "details": {"error_type": type(e).__name__},
             }
 
-    def get_table_counts(self, database_url: str) -> Dict[str, int]:
-        """Get row counts for all known tables in the given database."""
-        engine = create_engine(database_url)
-        inspector = inspect(engine)
-        existing_tables = set(inspector.get_table_names())
-        counts: Dict[str, int] = {}
+    def _existing_tables(self, engine) -> frozenset:
+        """Return the tables present in engine's database, cached per URL."""
+        url = engine.url.render_as_string(hide_password=False)
+        now = time.monotonic()
+        with self._counts_lock:
+            cached = self._table_names_cache.get(url)
+        if cached and cached[0] > now:
+            return cached[1]
+        names = frozenset(inspect(engine).get_table_names())
+        with self._counts_lock:
+            self._table_names_cache[url] = (now + TABLE_NAMES_CACHE_TTL_SECONDS, names)
+        return names
+
+    def _forget_tables(self, database_url: str) -> None:
+        """Drop cached table names and counts after the schema changes."""
+        url = make_url(database_url).render_as_string(hide_password=False)
+        with self._counts_lock:
+            self._table_names_cache.pop(url, None)
+            self._counts_cache.pop(database_url, None)
+
+    def get_table_counts(self, database_url: str, exact: bool = False) -> Dict[str, int]:
+        """Get row counts for all known tables in the given database.
+
+        PostgreSQL and MySQL return the planner's row estimates unless
+        ``exact`` is set, since COUNT(*) scans every table; SQLite always
+        counts. Non-exact results are cached for
+        TABLE_COUNTS_CACHE_TTL_SECONDS.
+        """
+        now = time.monotonic()
+        if not exact:
+            with self._counts_lock:
+                cached = self._counts_cache.get(database_url)
+            if cached and cached[0] > now:
+                return dict(cached[1])
+
+        counts = self._count_tables(get_engine(database_url), exact)
+
+        with self._counts_lock:
+            self._counts_cache[database_url] = (now + TABLE_COUNTS_CACHE_TTL_SECONDS, counts)
+        return dict(counts)
+
+    def _count_tables(self, engine, exact: bool) -> Dict[str, int]:
+        """Count rows per table, using catalog estimates where allowed."""
+        existing_tables = self._existing_tables(engine)
+        counts: Dict[str, int] = {name: 0 for name in TABLE_ORDER}
 
         with engine.connect() as conn:
+            estimates: Dict[str, int] = {}
+            if not exact and engine.dialect.name == "postgresql":
+                # reltuples is -1 for tables never analyzed; those get counted
+                result = conn.execute(text(
+                    "SELECT c.relname, c.reltuples::bigint FROM pg_class c "
+                    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                    "WHERE c.relkind = 'r' AND n.nspname = current_schema()"
+                ))
+                estimates = {name: n for name, n in result if n >= 0}
+            elif not exact and engine.dialect.name == "mysql":
+                result = conn.execute(text(
+                    "SELECT table_name, table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE()"
+                ))
+                estimates = {name: n for name, n in result if n is not None}
+
             for table_name in TABLE_ORDER:
-                if table_name in existing_tables:
+                if table_name not in existing_tables:
+                    continue
+                if table_name in estimates:
+                    counts[table_name] = int(estimates[table_name])
+                else:
                     result = conn.execute(text(f"SELECT COUNT(*) FROM {table_name}"))
                     counts[table_name] = result.scalar() or 0
-                else:
-                    counts[table_name] = 0
 
-        engine.dispose()
         return counts
 
-    def migrate(self, source_url: str, target_url: str) -> Dict[str, Any]:
+    def create_schema(self, target_url: str, target_engine: Optional[Engine] = None) -> Dict[str, Any]:
+        """Create all tables in the target database without copying data.
+
+        Returns:
+            dict with success, message, tables_migrated, row_counts.
+        """
+        try:
+            Base.metadata.create_all(target_engine or get_engine(target_url))
+        except Exception as e:
+            logger.error(f"Failed to create tables in target database: {e}")
+            return {"success": False, "message": "Failed to create tables in target database."}
+        finally:
+            self._forget_tables(target_url)
+        return {
+            "success": True,
+            "message": "Tables created in target database (no data migrated).",
+            "tables_migrated": 0,
+            "row_counts": {},
+        }
+
+    def migrate(
+        self,
+        source_url: str,
+        target_url: str,
+        batch_size: int = BATCH_SIZE,
+        on_progress: Optional[Callable[[str, int], None]] = None,
+        target_engine: Optional[Engine] = None,
+    ) -> Dict[str, Any]:
         """Migrate all data from source database to target database.
 
         Creates tables in the target, copies data table by table in FK-safe
-        order, and resets PostgreSQL sequences.
+        order, and resets PostgreSQL sequences. Rows are streamed from the
+        source and inserted ``batch_size`` at a time, each batch in its own
+        transaction, so memory use doesn't grow with table size.
+        ``on_progress(table_name, rows_copied)`` is called as each table
+        starts and after every batch. Pass ``target_engine`` to reuse an
+        engine (and its pooled connections) the caller already has for
+        target_url.
 
         The source database is never modified.
 
         Returns:
             dict with success, message, tables_migrated, row_counts.
         """
-        source_engine = create_engine(source_url)
-        target_engine = create_engine(target_url, pool_pre_ping=True)
+        source_engine = get_engine(source_url)
+        target_engine = target_engine or get_engine(target_url)
 
         try:
             # 1. Create all tables in target
             logger.info("Creating tables in target database...")
             Base.metadata.create_all(target_engine)
-
-            SourceSession = sessionmaker(bind=source_engine)
-            TargetSession = sessionmaker(bind=target_engine)
+            self._forget_tables(target_url)
 
             row_counts: Dict[str, int] = {}
             tables_migrated = 0
@@ -100,33 +204,26 @@ class DatabaseMigrationService:
 
                 logger.info(f"Migrating table: {table_name}")
 
-                with SourceSession() as source_sess:
-                    rows = source_sess.execute(table.select()).fetchall()
-
-                if not rows:
-                    row_counts[table_name] = 0
-                    tables_migrated += 1
-                    logger.info(f"  {table_name}: 0 rows (empty)")
-                    continue
-
-                # Get column names from the table
-                columns = [c.name for c in table.columns]
-
-                with TargetSession() as target_sess:
+                copied = 0
+                if on_progress:
+                    on_progress(table_name, copied)
+                with source_engine.connect() as source_conn, target_engine.connect() as target_conn:
                     # Clear any existing data in target table
-                    target_sess.execute(table.delete())
-                    target_sess.commit()
-
-                    # Batch insert
-                    row_dicts = [dict(zip(columns, row)) for row in rows]
-                    for i in range(0, len(row_dicts), BATCH_SIZE):
-                        batch = row_dicts[i:i + BATCH_SIZE]
-                        target_sess.execute(table.insert(), batch)
-                    target_sess.commit()
-
-                row_counts[table_name] = len(rows)
+                    target_conn.execute(table.delete())
+                    target_conn.commit()
+
+                    # Stream from the source, one executemany per batch
+                    result = source_conn.execution_options(yield_per=batch_size).execute(table.select())
+                    for batch in result.mappings().partitions():
+                        target_conn.execute(table.insert(), [dict(row) for row in batch])
+                        target_conn.commit()
+                        copied += len(batch)
+                        if on_progress:
+                            on_progress(table_name, copied)
+
+                row_counts[table_name] = copied
                 tables_migrated += 1
-                logger.info(f"  {table_name}: {len(rows)} rows migrated")
+                logger.info(f"  {table_name}: {copied} rows migrated")
 
             # 3. Reset PostgreSQL sequences
             if target_url.startswith("postgresql"):
@@ -149,6 +246,7 @@ class DatabaseMigrationService:
             # Attempt cleanup: drop tables in target
             try:
                 Base.metadata.drop_all(target_engine)
+                self._forget_tables(target_url)
                 logger.info("Cleaned up target database after failure.")
             except Exception as cleanup_err:
                 logger.error(f"Cleanup also failed: {cleanup_err}")
@@ -159,24 +257,24 @@ class DatabaseMigrationService:
                 "tables_migrated": 0,
                 "row_counts": {},
             }
-        finally:
-            source_engine.dispose()
-            target_engine.dispose()
 
     def purge_all_data(self, database_url: str) -> Dict[str, Any]:
         """Delete all rows from every known table (reverse FK order).
 
+        All deletes share one transaction; SQLite databases are vacuumed
+        afterwards to shrink the file.
+
         Returns:
             dict with success, message, rows_deleted (per table).
         """
-        engine = create_engine(database_url)
-        inspector = inspect(engine)
-        existing_tables = set(inspector.get_table_names())
+        engine = get_engine(database_url)
+        existing_tables = self._existing_tables(engine)
 
         try:
             rows_deleted: Dict[str, int] = {}
 
-            with engine.connect() as conn:
+            # One transaction for every table, so SQLite syncs to disk once
+            with engine.begin() as conn:
                 # Delete in reverse FK order to respect constraints
                 for table_name in reversed(TABLE_ORDER):
                     if table_name not in existing_tables:
@@ -184,7 +282,17 @@ class DatabaseMigrationService:
                     result = conn.execute(text(f"DELETE FROM {table_name}"))
                     rows_deleted[table_name] = result.rowcount
                     logger.info(f"  Purged {table_name}: {result.rowcount} rows deleted")
-                conn.commit()
+
+            if engine.dialect.name == "sqlite":
+                # Give the freed pages back; VACUUM can't run inside a transaction
+                try:
+                    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                        conn.execute(text("VACUUM"))
+                except Exception as e:
+                    logger.warning(f"VACUUM after purge failed: {e}")
+
+            with self._counts_lock:
+                self._counts_cache.clear()
 
             total = sum(rows_deleted.values())
             logger.info(f"Database purge complete: {total} total rows deleted")
@@ -201,8 +309,6 @@ class DatabaseMigrationService:
                 "message": f"Purge failed: {e}",
                 "rows_deleted": {},
             }
-        finally:
-            engine.dispose()
 
     def _reset_pg_sequences(self, engine):
         """Reset PostgreSQL auto-increment sequences to MAX(id) + 1."""
@@ -1,12 +1,19 @@
 """Encryption service for securing credentials."""
 import json
 import logging
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List
+import orjson
 from cryptography.fernet import Fernet, InvalidToken
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Decrypted plaintexts kept per Fernet token. A token always decrypts to the
+# same plaintext and updating a config produces a new token, so entries never
+# go stale; superseded tokens simply age out of the LRU.
+DECRYPT_CACHE_SIZE = 1024
+
 
 class EncryptionService:
     """Service for encrypting and decrypting sensitive data."""
@@ -23,6 +30,7 @@ class EncryptionService:
                 )
 
             self.cipher = Fernet(key.encode())
+            self._decrypt_token = lru_cache(maxsize=DECRYPT_CACHE_SIZE)(self._decrypt_token_uncached)
             logger.info("Encryption service initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize encryption service: {e}")
@@ -60,7 +68,7 @@ class EncryptionService:
             InvalidToken: If decryption fails
         """
         try:
-            decrypted_bytes = self.cipher.decrypt(encrypted_str.encode())
+            decrypted_bytes = self._decrypt_token(encrypted_str)
             json_str = decrypted_bytes.decode()
             return json.loads(json_str)
         except InvalidToken:
@@ -70,6 +78,33 @@ class EncryptionService:
             logger.error(f"Decryption failed: {e}")
             raise
 
+    def decrypt_many(self, encrypted_strs: List[str]) -> List[Dict[str, Any]]:
+        """
+        Decrypt several encrypted strings back to dictionaries in one call.
+
+        Args:
+            encrypted_strs: Encrypted strings (base64-encoded)
+
+        Returns:
+            Decrypted dictionaries, in the same order as the input
+
+        Raises:
+            InvalidToken: If any decryption fails
+        """
+        decrypt = self._decrypt_token
+        try:
+            return [orjson.loads(decrypt(value)) for value in encrypted_strs]
+        except InvalidToken:
+            logger.error("Invalid encryption token - data may be corrupted or key changed")
+            raise
+        except Exception as e:
+            logger.error(f"Decryption failed: {e}")
+            raise
+
+    def _decrypt_token_uncached(self, token: str) -> bytes:
+        """Decrypt a Fernet token; wrapped in an LRU cache as _decrypt_token."""
+        return self.cipher.decrypt(token.encode())
+
     def encrypt_string(self, value: str) -> str:
         """
         Encrypt a single string value.
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Optional
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import select
 
 logger = logging.getLogger(__name__)
 
@@ -102,11 +103,7 @@ class MonitoringService:
         db = SessionLocal()
         mon_job = None
         try:
-            config = (
-                db.query(MailboxConfig)
-                .filter(MailboxConfig.id == mailbox_config_id)
-                .first()
-            )
+            config = db.get(MailboxConfig, mailbox_config_id)
             if not config or not config.enabled:
                 logger.warning(
                     f"Mailbox config {mailbox_config_id} not found or disabled, skipping"
@@ -114,10 +111,8 @@ class MonitoringService:
                 return
 
             # Update monitoring job status
-            mon_job = (
-                db.query(MonitoringJob)
-                .filter(MonitoringJob.mailbox_config_id == mailbox_config_id)
-                .first()
+            mon_job = db.scalar(
+                select(MonitoringJob).where(MonitoringJob.mailbox_config_id == mailbox_config_id)
             )
             if mon_job:
                 mon_job.last_run_at = datetime.utcnow()
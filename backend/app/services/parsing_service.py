@@ -4,6 +4,7 @@ import logging
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
 from app.models.mailbox_config import MailboxConfig
@@ -168,51 +169,22 @@ class ParsingService:
         job: ParseJob,
         results: dict,
     ) -> None:
-        """Store parsed reports from a ParsingResults dict into ParsedReport rows."""
-        for report in results.get("aggregate_reports", []):
-            metadata = report.get("report_metadata", {})
-            policy = report.get("policy_published", {})
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type="aggregate",
-                org_name=metadata.get("org_name"),
-                report_id=metadata.get("report_id"),
-                domain=policy.get("domain"),
-                date_begin=self._parse_date(metadata.get("begin_date")),
-                date_end=self._parse_date(metadata.get("end_date")),
-                report_json=json.dumps(report, default=str),
-            )
-            db.add(db_report)
-
-        for report in results.get("forensic_reports", []):
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type="forensic",
-                org_name=None,
-                report_id=None,
-                domain=report.get("reported_domain"),
-                date_begin=self._parse_date(report.get("arrival_date_utc")),
-                date_end=None,
-                report_json=json.dumps(report, default=str),
-            )
-            db.add(db_report)
+        """Store parsed reports from a ParsingResults dict into ParsedReport rows.
 
-        for report in results.get("smtp_tls_reports", []):
-            policies = report.get("policies", [])
-            domain = policies[0].get("policy_domain") if policies else None
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type="smtp_tls",
-                org_name=report.get("organization_name"),
-                report_id=report.get("report_id"),
-                domain=domain,
-                date_begin=self._parse_date(report.get("begin_date")),
-                date_end=self._parse_date(report.get("end_date")),
-                report_json=json.dumps(report, default=str),
+        Rows go out as one executemany INSERT rather than through the ORM
+        unit of work, since nothing needs the report objects afterwards.
+        """
+        rows = [
+            self._report_row(job.id, report_type, report)
+            for report_type, key in (
+                ("aggregate", "aggregate_reports"),
+                ("forensic", "forensic_reports"),
+                ("smtp_tls", "smtp_tls_reports"),
             )
-            db.add(db_report)
-
-        db.flush()
+            for report in results.get(key, [])
+        ]
+        if rows:
+            db.execute(insert(ParsedReport), rows)
 
     def _store_single_parsed_report(
         self,
@@ -223,51 +195,45 @@ class ParsingService:
         """Store a single ParsedReport from parse_report_file() result."""
         report_type = parsed.get("report_type", "unknown")
         report = parsed.get("report", {})
+        db.execute(insert(ParsedReport), [self._report_row(job.id, report_type, report)])
+
+    def _report_row(self, job_id: int, report_type: str, report: dict) -> Dict[str, Any]:
+        """Build ParsedReport column values, pulling dashboard metadata from the report.
+
+        Every row has the same keys so rows can be inserted in one batch.
+        """
+        org_name = report_id = domain = date_begin = date_end = None
 
         if report_type == "aggregate":
             metadata = report.get("report_metadata", {})
-            policy = report.get("policy_published", {})
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type="aggregate",
-                org_name=metadata.get("org_name"),
-                report_id=metadata.get("report_id"),
-                domain=policy.get("domain"),
-                date_begin=self._parse_date(metadata.get("begin_date")),
-                date_end=self._parse_date(metadata.get("end_date")),
-                report_json=json.dumps(report, default=str),
-            )
+            org_name = metadata.get("org_name")
+            report_id = metadata.get("report_id")
+            domain = report.get("policy_published", {}).get("domain")
+            date_begin = self._parse_date(metadata.get("begin_date"))
+            date_end = self._parse_date(metadata.get("end_date"))
         elif report_type == "forensic":
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type="forensic",
-                domain=report.get("reported_domain"),
-                date_begin=self._parse_date(report.get("arrival_date_utc")),
-                report_json=json.dumps(report, default=str),
-            )
+            domain = report.get("reported_domain")
+            date_begin = self._parse_date(report.get("arrival_date_utc"))
         elif report_type == "smtp_tls":
             policies = report.get("policies", [])
+            org_name = report.get("organization_name")
+            report_id = report.get("report_id")
             domain = policies[0].get("policy_domain") if policies else None
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type="smtp_tls",
-                org_name=report.get("organization_name"),
-                report_id=report.get("report_id"),
-                domain=domain,
-                date_begin=self._parse_date(report.get("begin_date")),
-                date_end=self._parse_date(report.get("end_date")),
-                report_json=json.dumps(report, default=str),
-            )
+            date_begin = self._parse_date(report.get("begin_date"))
+            date_end = self._parse_date(report.get("end_date"))
         else:
             logger.warning(f"Unknown report type: {report_type}")
-            db_report = ParsedReport(
-                parse_job_id=job.id,
-                report_type=report_type,
-                report_json=json.dumps(report, default=str),
-            )
 
-        db.add(db_report)
-        db.flush()
+        return {
+            "parse_job_id": job_id,
+            "report_type": report_type,
+            "org_name": org_name,
+            "report_id": report_id,
+            "domain": domain,
+            "date_begin": date_begin,
+            "date_end": date_end,
+            "report_json": json.dumps(report, default=str),
+        }
 
     def _parse_date(self, date_str: Optional[str]) -> Optional[datetime]:
         """Attempt to parse a date string into a datetime object."""
@@ -0,0 +1,81 @@
+"""Helpers for updating the application's .env file."""
+import os
+import tempfile
+from pathlib import Path
+from typing import Mapping, Optional
+
+# Same file app.config reads settings from
+ENV_PATH = Path(__file__).parent.parent.parent.parent / ".env"
+
+
+def update_env(updates: Mapping[str, Optional[str]], env_path: Path = ENV_PATH) -> None:
+    """Set keys in the .env file, or remove them where the value is None.
+
+    The file is read once and written once, whatever the number of keys,
+    and not written at all if nothing changes. Existing keys keep their
+    position; comments and blank lines are kept; new keys are appended.
+    """
+    try:
+        content = _read_env(env_path)
+    except FileNotFoundError:
+        content = ""
+    lines = content.split("\n") if content else []
+
+    written = set()
+    out = []
+    for line in lines:
+        key, sep, _ = line.partition("=")
+        if sep and key in updates and key not in written:
+            value = updates[key]
+            if value is None:
+                continue
+            line = f"{key}={value}"
+            written.add(key)
+        out.append(line)
+    out.extend(
+        f"{key}={value}"
+        for key, value in updates.items()
+        if value is not None and key not in written
+    )
+
+    new_content = "\n".join(out)
+    if new_content != content:
+        _write_env(env_path, new_content)
+
+
+def _read_env(env_path: Path) -> str:
+    """Read the .env file with one unbuffered read sized from fstat."""
+    fd = os.open(env_path, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+    try:
+        data = os.read(fd, os.fstat(fd).st_size)
+    finally:
+        os.close(fd)
+    # Normalize line endings as text mode would
+    return data.decode("utf-8").replace("\r\n", "\n")
+
+
+def _write_env(env_path: Path, content: str) -> None:
+    """Atomically replace the .env file, readable only by the owner."""
+    # mkstemp creates the file with mode 0600, so secrets are never exposed
+    fd, tmp_path = tempfile.mkstemp(dir=env_path.parent, prefix=".env.")
+    try:
+        try:
+            data = memoryview(content.encode("utf-8"))
+            while data:
+                data = data[os.write(fd, data):]
+            # One fsync before the rename, so a crash can't leave an empty .env
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        try:
+            os.replace(tmp_path, env_path)
+        except OSError:
+            # A single-file bind mount (Docker) can't be replaced; write in place
+            env_path.write_text(content)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+    try:
+        os.chmod(env_path, 0o600)
+    except OSError:
+        pass  # chmod not supported on Windows
@@ -2,7 +2,7 @@ import { apiClient } from './client'
 import type { PaginatedResponse } from '@/types/api'
 import type { ParseJob, ParsedReport, ParseMailboxRequest } from '@/types/parsing'
 
-function buildQuery(params: Record<string, string | number | undefined>): string {
+function buildQuery(params: Record<string, string | number | boolean | undefined>): string {
   const query = new URLSearchParams()
   for (const [key, value] of Object.entries(params)) {
     if (value !== undefined && value !== '') {
@@ -28,6 +28,8 @@ export const parsingApi = {
     params: {
       skip?: number
       limit?: number
+      cursor?: string
+      include_total?: boolean
       report_type?: string
       domain?: string
       org_name?: string
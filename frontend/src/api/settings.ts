@@ -4,7 +4,7 @@ import type {
   DatabaseTestRequest,
   DatabaseTestResponse,
   DatabaseMigrateRequest,
-  DatabaseMigrateResponse,
+  DatabaseMigrationStatus,
   DatabasePurgeResponse,
 } from '@/types/settings'
 
@@ -16,7 +16,10 @@ export const settingsApi = {
     apiClient.post<DatabaseTestResponse>('/api/settings/database/test', config),
 
   migrateDatabase: (config: DatabaseMigrateRequest) =>
-    apiClient.post<DatabaseMigrateResponse>('/api/settings/database/migrate', config),
+    apiClient.post<DatabaseMigrationStatus>('/api/settings/database/migrate', config),
+
+  getMigrationStatus: (jobId: string) =>
+    apiClient.get<DatabaseMigrationStatus>(`/api/settings/database/migrate/${jobId}`),
 
   purgeDatabase: () =>
     apiClient.post<DatabasePurgeResponse>('/api/settings/database/purge?confirm=true', {}),
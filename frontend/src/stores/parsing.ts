@@ -33,9 +33,9 @@ export const useParsingStore = defineStore('parsing', () => {
   } = {}) {
     reportsLoading.value = true
     try {
-      const result = await parsingApi.listReports(params)
+      const result = await parsingApi.listReports({ ...params, include_total: true })
       reports.value = result.items
-      reportsTotal.value = result.total
+      reportsTotal.value = result.total ?? 0
     } catch {
       // handled by view
     } finally {
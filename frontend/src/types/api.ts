@@ -10,6 +10,8 @@ export interface SetupStepResponse {
 }
 
 export interface PaginatedResponse<T> {
-  total: number
   items: T[]
+  has_more: boolean
+  next_cursor: string | null
+  total: number | null
 }
@@ -24,7 +24,7 @@ export interface ParsedReport {
   domain: string | null
   date_begin: string | null
   date_end: string | null
-  report_json: unknown
+  report_json: Record<string, unknown> | null
   created_at: string
 }
 
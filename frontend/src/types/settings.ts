@@ -2,6 +2,7 @@ export interface DatabaseInfo {
   db_type: string
   connection_string: string
   table_counts: Record<string, number>
+  counts_estimated: boolean
 }
 
 export interface DatabaseTestRequest {
@@ -15,6 +16,7 @@ export interface DatabaseTestRequest {
 
 export interface DatabaseMigrateRequest extends DatabaseTestRequest {
   migrate_data: boolean
+  batch_size?: number
 }
 
 export interface DatabaseTestResponse {
@@ -23,11 +25,13 @@ export interface DatabaseTestResponse {
   details?: Record<string, string>
 }
 
-export interface DatabaseMigrateResponse {
-  success: boolean
+export interface DatabaseMigrationStatus {
+  job_id: string
+  status: 'running' | 'completed' | 'failed'
   message: string
+  current_table: string | null
   tables_migrated: number
-  row_counts?: Record<string, number>
+  row_counts: Record<string, number>
   restart_required: boolean
 }
 